@@ -1,8 +1,21 @@
-from multiprocessing import Process, Queue
+from concurrent.futures import ProcessPoolExecutor
+import os
+import sys
 import time
 
+import numpy as np
+
+# Wallis factors per sub-range (one task of the pool)
+CHUNK_TERMS = 4_000_000
+
+# Wallis factors per NumPy block inside a sub-range
+BLOCK_TERMS = 1 << 20
+
+# Parameter grid of benchmark.py: approximate_pi, approximate_pi_numpy and approximate_pi_parallel
+BENCHMARKS = {"approximate_pi": {"n": [1_822_725, 9_716_266]}}
+
 # Function to approximate Pi
-def approximate_pi(n, results=None, idx=None):
+def approximate_pi(n):
     pi_2 = 1
     nom, den = 2.0, 1.0
     for i in range(n):
@@ -11,37 +24,85 @@ def approximate_pi(n, results=None, idx=None):
             nom += 2
         else:
             den += 2
-    approx_pi = 2 * pi_2
+    return 2 * pi_2
+
+
+def wallis_partial(start, stop, block=BLOCK_TERMS):
+    """Product of the Wallis factors start, ..., stop - 1.
+
+    Factor i of approximate_pi is nom / den with nom = 2 * (i // 2 + 1) and
+    den = 2 * ((i + 1) // 2) + 1. Each block of factors is built with NumPy and
+    multiplied with np.prod; all factors are close to 1, so the partial
+    products neither overflow nor underflow.
+    """
+    product = 1.0
+    for lo in range(start, stop, block):
+        i = np.arange(lo, min(lo + block, stop), dtype=np.int64)
+        nom = (i // 2 + 1) * 2.0
+        den = (i + 1) // 2 * 2 + 1.0
+        product *= float(np.prod(nom / den))
+    return product
+
+
+def approximate_pi_numpy(n):
+    """approximate_pi(n) with NumPy blocks in the calling process."""
+    return 2 * wallis_partial(0, n)
+
+
+def approximate_pi_parallel(n, workers=None):
+    """approximate_pi(n) with NumPy blocks in a process pool."""
+    return approximate_pi_chunked([n], workers)[n]
+
+
+def _wallis_partial(bounds):
+    return wallis_partial(*bounds)
 
-    
-    if results is not None and idx is not None:
-        results[idx] = [n, approx_pi]
-    elif results is not None:
-        results.put([n, approx_pi])
-    else:
-        return approx_pi
+
+def approximate_pi_chunked(nums, workers=None, chunk_terms=CHUNK_TERMS):
+    """Approximate Pi for every N in nums with a fixed-size process pool.
+
+    All N share the leading factors of the Wallis product, so [0, max(nums)) is
+    split once into sub-ranges of at most chunk_terms factors, with extra
+    borders at every N. Idle workers take the next sub-range from the pool's
+    queue, so all cores stay busy until the end, and the total work is
+    max(nums) factors instead of sum(nums). The partial products are combined
+    in range order, so the results do not depend on scheduling.
+
+    Args:
+    - nums: Numbers of factors N.
+    - workers: Number of processes. Default is the CPU count.
+    - chunk_terms: Maximum number of factors per sub-range. Default is 4M.
+
+    Returns:
+    - dict: {N: approximation of Pi}, in the order of nums.
+    """
+    if not nums:
+        return {}
+    end = max(nums)
+    edges = sorted(set(range(0, end, chunk_terms)) | set(nums) | {0, end})
+    ranges = list(zip(edges[:-1], edges[1:]))
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        partials = list(executor.map(_wallis_partial, ranges))
+
+    # prefix[k]: product of all factors below edges[k]
+    prefix = {0: 1.0}
+    product = 1.0
+    for (_, stop), partial in zip(ranges, partials):
+        product *= partial
+        prefix[stop] = product
+    return {n: float(2 * prefix[n]) for n in nums}
 
 # List of N values to process
 nums = [1_822_725, 22_059_421, 32_374_695, 88_754_320, 97_162_66, 200_745_654]
 
 # Function to parallelize the computation
-if __name__ == "__main__":
+if __name__ == "__main__" and "--per-process" in sys.argv:
 
     start = time.time()
 
-    queue = Queue()
-    jobs = []
-    for n in nums:
-        proc = Process(target=approximate_pi, args=(n, queue))
-        jobs.append(proc)
-        proc.start()
-
-    for proc in jobs:
-        proc.join()
-
-    results = []
-    while not queue.empty():
-        results.append(queue.get())
+    # One process per N
+    with ProcessPoolExecutor(max_workers=len(nums)) as executor:
+        results = list(zip(nums, executor.map(approximate_pi, nums)))
 
     end = time.time()
 
@@ -49,4 +110,16 @@ if __name__ == "__main__":
     print(f"Time taken: {end - start} seconds")
     for result in results:
         print(f"N =: Approximation of Pi = {result}")
-    print(results)
\ No newline at end of file
+    print(results)
+
+# Chunked, load-balanced computation (default)
+elif __name__ == "__main__":
+
+    start = time.time()
+    results = approximate_pi_chunked(nums)
+    end = time.time()
+
+    print("CHUNKED MULTIPROCESSING Results:")
+    print(f"Time taken: {end - start} seconds")
+    for n, approx_pi in results.items():
+        print(f"N = {n}: Approximation of Pi = {approx_pi}")
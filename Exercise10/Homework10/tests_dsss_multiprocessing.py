@@ -0,0 +1,29 @@
+import unittest
+
+from dsss_multiprocessing import approximate_pi, approximate_pi_chunked, approximate_pi_numpy, wallis_partial
+
+
+class TestWallis(unittest.TestCase):
+
+    def test_partial_products(self):
+        for start, stop in [(0, 0), (0, 1), (0, 2), (3, 4), (5, 17), (0, 1001)]:
+            expected = approximate_pi(stop) / approximate_pi(start)
+            for block in (1, 2, 7, 1 << 20):
+                self.assertAlmostEqual(wallis_partial(start, stop, block), expected, delta=1e-14)
+        self.assertEqual(wallis_partial(4, 4), 1.0)
+
+    def test_chunk_edges(self):
+        nums = [0, 1, 2, 3, 10, 1001]
+        for chunk_terms in (1, 3, 1000):
+            results = approximate_pi_chunked(nums, workers=2, chunk_terms=chunk_terms)
+            self.assertEqual(list(results), nums)
+            for n, value in results.items():
+                self.assertIs(type(value), float)
+                self.assertAlmostEqual(value, approximate_pi(n), delta=1e-14)
+        self.assertEqual(approximate_pi_chunked([]), {})
+        self.assertIs(type(approximate_pi_numpy(10)), float)
+        self.assertAlmostEqual(approximate_pi_numpy(1001), approximate_pi(1001), delta=1e-14)
+
+
+if __name__ == "__main__":
+    unittest.main()
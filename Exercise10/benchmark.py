@@ -0,0 +1,337 @@
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+import psutil
+
+# Folders searched for modules with a module-level BENCHMARKS grid
+BENCHMARK_DIRS = [
+    os.path.dirname(os.path.abspath(__file__)),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "Homework10"),
+]
+
+# Stored baseline the results are compared with (written by --save-baseline)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Results of the last run
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__cache__", "benchmark_results.json")
+
+# A case regressed if its median time grew by more than this fraction of the baseline
+THRESHOLD = 0.2
+
+# Slowdowns below this many seconds are timer noise and never count as a regression
+MIN_SECONDS = 1e-3
+
+# Fast kernels are called repeatedly until one timed repeat takes at least this many seconds
+MIN_REPEAT_SECONDS = 0.02
+
+# Seconds between two RSS samples
+SAMPLE_INTERVAL = 0.005
+
+
+def discover(dirs=BENCHMARK_DIRS):
+    """Find all kernel families of the modules in dirs.
+
+    A module takes part by defining BENCHMARKS = {base: grid}, where grid maps
+    parameter names to lists of values. Every public function or class of the
+    module named base or base_<variant> is a kernel of that family (e.g.
+    sum_of_squares_slow and sum_of_squares_fast), as long as the grid covers
+    its required parameters. Each kernel gets only the parameters in its
+    signature.
+
+    Returns:
+    - list: One dict per family with "name", "kernels" ({name: callable}) and "grid".
+    """
+    families = []
+    for folder in dirs:
+        for file in sorted(os.listdir(folder)):
+            if not file.endswith(".py") or file == os.path.basename(__file__):
+                continue
+            # Only import modules that declare benchmarks
+            with open(os.path.join(folder, file), encoding="utf-8") as f:
+                if not re.search(r"^BENCHMARKS = ", f.read(), re.MULTILINE):
+                    continue
+            if folder not in sys.path:
+                sys.path.insert(0, folder)
+            module = importlib.import_module(file[:-3])
+            for base, grid in module.BENCHMARKS.items():
+                kernels = {
+                    name: obj for name, obj in sorted(vars(module).items())
+                    if (name == base or name.startswith(base + "_")) and callable(obj)
+                    and getattr(obj, "__module__", None) == module.__name__ and _required(obj) <= set(grid)
+                }
+                families.append({"name": f"{module.__name__}.{base}", "kernels": kernels, "grid": grid})
+    return families
+
+
+def _required(fn):
+    return {name for name, parameter in inspect.signature(fn).parameters.items()
+            if parameter.default is inspect.Parameter.empty
+            and parameter.kind not in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD)}
+
+
+def _accepted(fn, params):
+    parameters = inspect.signature(fn).parameters
+    if any(parameter.kind == parameter.VAR_KEYWORD for parameter in parameters.values()):
+        return dict(params)
+    return {name: value for name, value in params.items() if name in parameters}
+
+
+def expand(grid):
+    """All combinations of a parameter grid, as a list of dicts."""
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def case_key(module, kernel, params):
+    arguments = ", ".join(f"{name}={value!r}" for name, value in params.items())
+    return f"{module}.{kernel}({arguments})"
+
+
+def selected(key, select):
+    """True if select occurs in key as whole words: "n=1000" matches n=1000 but not n=1000000,
+    "approximate_pi" matches approximate_pi(...) but not approximate_pi_numpy(...)."""
+    if not select:
+        return True
+    # Word boundaries only where select itself starts or ends with a word character
+    before = r"(?<!\w)" if re.match(r"\w", select[0]) else ""
+    after = r"(?!\w)" if re.match(r"\w", select[-1]) else ""
+    return re.search(before + re.escape(select) + after, key) is not None
+
+
+class RssSampler:
+    """Peak resident memory of this process and all its child processes (e.g. pool workers).
+
+    A background thread samples psutil every SAMPLE_INTERVAL seconds while the
+    sampler is entered; peak is in bytes and cpu_seconds is the CPU time of
+    the sampling thread itself.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self.cpu_seconds = 0.0
+        self._stop = threading.Event()
+
+    def sample(self):
+        rss = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        self.peak = max(self.peak, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+        self.cpu_seconds = time.thread_time()
+
+    def __enter__(self):
+        self.peak = 0
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def _calls_per_repeat(fn, params, min_seconds=MIN_REPEAT_SECONDS):
+    """1, 10, 100, ... calls, until they take at least min_seconds (like timeit's autorange)."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(**params)
+        if time.perf_counter() - start >= min_seconds:
+            return number
+        number *= 10
+
+
+def measure(fn, params, warmup=1, repeats=5):
+    """Time fn(**params) after warmup calls.
+
+    Kernels faster than MIN_REPEAT_SECONDS are called several times per
+    repeat; times are per call. CPU utilization is the CPU time of this process and of the child
+    processes that finished during the runs, divided by the wall time; a
+    kernel keeping 4 cores busy has a utilization of about 4.
+
+    Returns:
+    - (stats, result): Dict with the times and their statistics, and the result of the last call.
+    """
+    for _ in range(warmup):
+        fn(**params)
+    number = _calls_per_repeat(fn, params)
+    times = []
+    with RssSampler() as sampler:
+        # process_time has a fine resolution, os.times adds the (tick-resolution) time of finished children
+        cpu_start, children_start = time.process_time(), os.times()
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(number):
+                result = fn(**params)
+            times.append((time.perf_counter() - start) / number)
+        cpu_end, children_end = time.process_time(), os.times()
+    cpu = (cpu_end - cpu_start - sampler.cpu_seconds + children_end.children_user - children_start.children_user
+           + children_end.children_system - children_start.children_system)
+    stats = {
+        "times": times,
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "min": min(times),
+        "calls_per_repeat": number,
+        "cpu_utilization": cpu / (sum(times) * number),
+        "peak_rss_mb": sampler.peak / 2 ** 20,
+    }
+    return stats, result
+
+
+def same_result(a, b):
+    """True/False for numeric results (close within 1e-9), None if they cannot be compared."""
+    if isinstance(a, int) and isinstance(b, int):
+        return a == b
+    try:
+        a, b = np.asarray(a), np.asarray(b)
+    except (TypeError, ValueError):
+        return None
+    if a.dtype.kind not in "biuf" or b.dtype.kind not in "biuf":
+        return None
+    return a.shape == b.shape and bool(np.allclose(a, b, rtol=1e-9, atol=0))
+
+
+def run(families, warmup=1, repeats=5, select=None, verbose=True):
+    """Benchmark every kernel of every family at every grid point.
+
+    Args:
+    - families: Output of discover.
+    - warmup: Untimed calls before the timing. Default is 1.
+    - repeats: Timed calls. Default is 5.
+    - select: Only run cases whose key contains this text as whole words (see selected). Default is None (all).
+    - verbose: Print one line per case. Default is True.
+
+    Returns:
+    - dict: "machine" info and "results" ({case key: stats}).
+    """
+    results = {}
+    for family in families:
+        module = family["name"].rsplit(".", 1)[0]
+        for params in expand(family["grid"]):
+            reference = None
+            for name, kernel in family["kernels"].items():
+                kernel_params = _accepted(kernel, params)
+                key = case_key(module, name, kernel_params)
+                if not selected(key, select):
+                    continue
+                stats, result = measure(kernel, kernel_params, warmup, repeats)
+                if reference is None:
+                    reference = result
+                    stats["same_result"] = None
+                else:
+                    stats["same_result"] = same_result(result, reference)
+                stats.update({"family": family["name"], "kernel": name, "params": kernel_params})
+                results[key] = stats
+                if verbose:
+                    differs = ", RESULT DIFFERS" if stats["same_result"] is False else ""
+                    print(f"{key}: median {stats['median'] * 1000:.4g} ms ± {stats['stdev'] * 1000:.2g} ms "
+                          f"({repeats} x {stats['calls_per_repeat']} calls), CPU {stats['cpu_utilization']:.0%}, "
+                          f"peak RSS {stats['peak_rss_mb']:.0f} MB{differs}")
+    machine = {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+    return {"machine": machine, "warmup": warmup, "repeats": repeats, "results": results}
+
+
+def compare(current, baseline, threshold=THRESHOLD, min_seconds=MIN_SECONDS, select=None):
+    """Cases whose median got slower than the baseline by more than threshold (and min_seconds).
+
+    Args:
+    - current, baseline: Outputs of run.
+    - threshold, min_seconds: See THRESHOLD and MIN_SECONDS.
+    - select: Text the current run was restricted to; baseline cases without it are not missing.
+
+    Returns:
+    - (regressions, missing, new): (key, baseline median, current median) per regression, the
+      baseline cases that were not run and the cases that have no baseline.
+    """
+    regressions = []
+    for key, stats in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        slower = stats["median"] - before["median"]
+        if slower > threshold * before["median"] and slower > min_seconds:
+            regressions.append((key, before["median"], stats["median"]))
+    missing = [key for key in baseline["results"]
+               if key not in current["results"] and selected(key, select)]
+    new = [key for key in current["results"] if key not in baseline["results"]]
+    return regressions, missing, new
+
+
+def save(results, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Exercise10 kernels and compare with a baseline.")
+    parser.add_argument("-k", "--select", help="only run cases whose name contains this text as whole words, "
+                                                   "e.g. 'n=1000000' or 'prime_sieve.PrimeSieve'")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=RESULTS_PATH, help="JSON file of the results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="JSON file of the baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed slowdown of the median as a fraction, default 0.2")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run(discover(), args.warmup, args.repeats, args.select)
+    save(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        save(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to store one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["machine"] != results["machine"]:
+        print("Warning: the baseline was recorded on a different machine or environment")
+    regressions, missing, new = compare(results, baseline, args.threshold, select=args.select)
+    for key in missing:
+        print(f"MISSING {key}: in the baseline, but not benchmarked")
+    for key in new:
+        print(f"NEW {key}: no baseline, run with --save-baseline to add it")
+    for key, before, after in regressions:
+        print(f"REGRESSION {key}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({after / before - 1:+.0%})")
+    print(f"{len(regressions)} regressions above {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,113 @@
-import concurrent.futures
-
 import flammkuchen as fl
+import asyncio
 import os
 import numpy as np
+import threading
 import time
 import string
-import random
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from parallel_map import parallel_map
+
+# Characters of the random files, as byte values
+ALPHABET = np.frombuffer((string.ascii_letters + string.digits).encode(), dtype=np.uint8)
+
+# Size of one reusable buffer, i.e. bytes generated and written per block
+BLOCK_SIZE = 1 << 20
+
+# Buffers written with one writev call
+VECTOR_BLOCKS = 4
+
+# Block writes in flight in write_files_async
+QUEUE_DEPTH = 8
+
+# os.open flags of the output files (O_BINARY prevents newline translation on Windows)
+OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def _write_all(fd, view):
+    """os.write until the whole memoryview is written."""
+    while len(view):
+        view = view[os.write(fd, view):]
+
+
+def _writev_all(fd, views):
+    """os.writev of several memoryviews, continuing after a short write."""
+    if not hasattr(os, "writev"):
+        for view in views:
+            _write_all(fd, view)
+        return
+    written = os.writev(fd, views)
+    for view in views:
+        if written >= len(view):
+            written -= len(view)
+        else:
+            _write_all(fd, view[written:])
+            written = 0
+
+
+def _pwrite_all(fd, view, offset):
+    """os.pwrite of a memoryview at offset (without pwrite: seek and write, callers keep one write in flight)."""
+    if not hasattr(os, "pwrite"):
+        os.lseek(fd, offset, os.SEEK_SET)
+        _write_all(fd, view)
+        return
+    while len(view):
+        written = os.pwrite(fd, view, offset)
+        view, offset = view[written:], offset + written
+
+
+class RandomFileWriter:
+    """Write files of random alphanumeric characters from reusable buffers.
+
+    Random indices from rng.integers are mapped through the ALPHABET lookup
+    table straight into preallocated byte buffers (np.take with out=), so a
+    1 MB file costs two vectorized NumPy calls instead of a million Python
+    strings from random.choices. The buffers are handed to os.writev as
+    memoryviews without any copy. NumPy releases the GIL while generating
+    and so does os.writev, so threads writing files in parallel scale with the
+    disk instead of serializing on the interpreter.
+
+    A writer is not thread-safe; use one per thread (generate_and_save_file does).
+
+    Args:
+    - block_size: Bytes per buffer. Default is 1 MB.
+    - blocks: Number of buffers, written together with one writev call. Default is 4.
+    - seed: Seed of the random generator. Default is None (fresh entropy).
+    """
 
-import concurrent.futures
+    def __init__(self, block_size=BLOCK_SIZE, blocks=VECTOR_BLOCKS, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.buffers = [np.empty(block_size, dtype=np.uint8) for _ in range(blocks)]
+
+    def fill(self, buffer):
+        """Fill a uint8 array with random characters of ALPHABET."""
+        indices = self.rng.integers(0, len(ALPHABET), size=len(buffer), dtype=np.uint8)
+        np.take(ALPHABET, indices, out=buffer)
+        return buffer
+
+    def write(self, file_path, size):
+        """Write a file of size random characters."""
+        fd = os.open(file_path, OPEN_FLAGS, 0o644)
+        try:
+            remaining = size
+            while remaining:
+                views = []
+                for buffer in self.buffers:
+                    n = min(remaining, self.block_size)
+                    if not n:
+                        break
+                    views.append(memoryview(self.fill(buffer[:n])))
+                    remaining -= n
+                _writev_all(fd, views)
+        finally:
+            os.close(fd)
+
+
+# One RandomFileWriter (and its buffers) per thread
+_local = threading.local()
 
 
 def generate_and_save_file(file_path, size=1024 * 1024):
@@ -18,12 +117,73 @@ def generate_and_save_file(file_path, size=1024 * 1024):
     - file_path: Path to save the file.
     - size: Size of the file in bytes. Default is 1MB.
     """
-    # Generate random data
-    content = ''.join(random.choices(string.ascii_letters + string.digits, k=size))
+    writer = getattr(_local, "writer", None)
+    if writer is None:
+        writer = _local.writer = RandomFileWriter()
+    writer.write(file_path, size)
+
+
+async def write_files_async(file_paths, size=1024 * 1024, depth=QUEUE_DEPTH, block_size=BLOCK_SIZE, seed=None):
+    """Write random files with a fixed queue depth of block writes.
+
+    Works like a submission queue of io_uring: the event loop fills one of
+    depth buffers and submits a positional write (os.pwrite at the block's
+    offset) to a thread pool, so up to depth writes are in flight while the
+    next block is generated. A buffer returns to the free list as soon as its
+    write completes, so memory stays at depth * block_size for any number of
+    files. Without os.pwrite (Windows) the depth is 1.
+
+    Args:
+    - file_paths: Paths of the files.
+    - size: Size of each file in bytes. Default is 1MB.
+    - depth: Block writes in flight. Default is 8.
+    - block_size: Bytes per block. Default is 1 MB.
+    - seed: Seed of the random generator. Default is None.
+    """
+    depth = depth if hasattr(os, "pwrite") else 1
+    loop = asyncio.get_running_loop()
+    writer = RandomFileWriter(block_size, blocks=0, seed=seed)
+    free = asyncio.Queue()
+    for _ in range(depth):
+        free.put_nowait(np.empty(block_size, dtype=np.uint8))
+    # Outstanding blocks per open file; the file is closed after its last block
+    remaining = {}
+    pending = set()
 
-    # Save the file
-    with open(file_path, 'w') as file:
-        file.write(content)
+    async def submit(fd, view, offset, buffer):
+        try:
+            await loop.run_in_executor(executor, _pwrite_all, fd, view, offset)
+        finally:
+            free.put_nowait(buffer)
+            remaining[fd] -= 1
+            if not remaining[fd]:
+                del remaining[fd]
+                os.close(fd)
+
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        try:
+            for file_path in file_paths:
+                fd = os.open(file_path, OPEN_FLAGS, 0o644)
+                offsets = range(0, size, block_size)
+                if not offsets:
+                    os.close(fd)
+                    continue
+                remaining[fd] = len(offsets)
+                for offset in offsets:
+                    buffer = await free.get()
+                    view = memoryview(writer.fill(buffer[:min(block_size, size - offset)]))
+                    pending.add(asyncio.ensure_future(submit(fd, view, offset, buffer)))
+                    # Raise the first failed write right away
+                    done = {task for task in pending if task.done()}
+                    pending -= done
+                    for task in done:
+                        task.result()
+            await asyncio.gather(*pending)
+        finally:
+            if pending:
+                await asyncio.wait(pending)
+            for fd in remaining:
+                os.close(fd)
 
 
 if __name__ == "__main__":
@@ -51,8 +211,18 @@ if __name__ == "__main__":
 
     # Multithreading
     start = time.time()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        executor.map(generate_and_save_file, file_paths)
+    parallel_map(generate_and_save_file, file_paths, kind="io", workers=10)
     end = time.time()
     print(f"Multithreading time: {end - start}")
+    print("----------------------------")
+
+    # delete files
+    for f in file_paths:
+        os.remove(f)
+
+    # Asyncio, QUEUE_DEPTH block writes in flight
+    start = time.time()
+    asyncio.run(write_files_async(file_paths))
+    end = time.time()
+    print(f"Asyncio (queue depth {QUEUE_DEPTH}) time: {end - start}")
     print("----------------------------")
\ No newline at end of file
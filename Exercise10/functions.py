@@ -1,3 +1,6 @@
+# Parameter grid of benchmark.py: sum_of_squares_slow and sum_of_squares_fast for every N
+BENCHMARKS = {"sum_of_squares": {"N": [10_000, 1_000_000]}}
+
 def sum_of_squares_slow(N):
     total = N
     for i in range(1, N + 1):
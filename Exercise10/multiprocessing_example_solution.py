@@ -1,35 +1,23 @@
-from multiprocessing import Process, Queue
-import threading
 import time
 
-def find_primes(n, results=None, idx=None):
+from parallel_map import parallel_map
+from prime_sieve import PrimeSieve
+
+def find_primes(n):
     """
     Find the number of prime numbers less than or equal to n.
     
     Args:
         n (int): The upper limit for finding prime numbers.
-        results (Queue/List, optional): A queue or a List to store the result. Defaults to None.
-        idx (int, optional): The index to store the result in the queue. Defaults to None.
     
     Returns:
         int: The number of prime numbers less than or equal to n.
     """
-    prime = [True for _ in range(n+1)]
-    p = 2
-    while (p * p <= n):
-        if (prime[p] == True):
-            for i in range(p * p, n+1, p):
-                prime[i] = False
-        p += 1
-    n_primes = sum(prime) - 2
-
-    if results is not None and idx is not None:
-        results[idx] = [n, n_primes]
-    elif results is not None:
-        results.put([n, n_primes])
-    else:
-        return n_primes
-    
+    # Segmented, bit-packed sieve over the odd numbers (see prime_sieve.py). Every call
+    # sieves from scratch in its own process or thread, so the sections below compare
+    # the same amount of work
+    return PrimeSieve(n, workers=1).count()
+
 
 #NUMBERS = [20_000_000]
 NUMBERS = [20_000_000, 20_000_000, 20_000_000, 20_000_000]
@@ -60,19 +48,9 @@ if __name__ == "__main__":
 
     start = time.time()
 
-    queue = Queue()
-    jobs = []
-    for n in NUMBERS:
-        proc = Process(target=find_primes, args=(n, queue))
-        jobs.append(proc)
-        proc.start()
-
-    for proc in jobs:
-        proc.join()
-
-    results = []
-    while not queue.empty():
-        results.append(queue.get())
+    # One process per number, results come back in the order of NUMBERS
+    n_primes = parallel_map(find_primes, NUMBERS, backend="processes", workers=len(NUMBERS))
+    results = list(zip(NUMBERS, n_primes))
 
     end = time.time()
 
@@ -88,16 +66,8 @@ if __name__ == "__main__":
 if __name__ == "__main__":
     start = time.time()
 
-    results = [None] * len(NUMBERS)
-
-    jobs = []
-    for idx, n in enumerate(NUMBERS):
-        thread = threading.Thread(target=find_primes, args=(n, results, idx))
-        jobs.append(thread)
-        thread.start()
-
-    for thread in jobs:
-        thread.join()
+    n_primes = parallel_map(find_primes, NUMBERS, backend="threads", workers=len(NUMBERS))
+    results = list(zip(NUMBERS, n_primes))
 
     end = time.time()
 
@@ -105,4 +75,21 @@ if __name__ == "__main__":
     print(f"Time taken: {end - start} seconds")
     for res in results:
         n, n_primes = res
-        print(f"{n}: {n_primes} primes")
\ No newline at end of file
+        print(f"{n}: {n_primes} primes")
+
+
+##################################
+# Segmented sieve: all cores on a single n
+##################################
+if __name__ == "__main__":
+    start = time.time()
+
+    sieve = PrimeSieve(max(NUMBERS))
+    results = [[n, sieve.count(n)] for n in NUMBERS]
+
+    end = time.time()
+
+    print("SEGMENTED SIEVE Results:")
+    print(f"Time taken: {end - start} seconds")
+    for n, n_primes in results:
+        print(f"{n}: {n_primes} primes")
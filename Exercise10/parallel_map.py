@@ -0,0 +1,325 @@
+import asyncio
+import concurrent.futures
+import inspect
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Backends of ParallelMap; "auto" chooses one of them with choose_backend
+BACKENDS = ("serial", "processes", "threads", "asyncio", "interpreters")
+
+# Chunks in flight per worker; the input is consumed lazily, never further ahead than this
+PENDING_PER_WORKER = 2
+
+
+def choose_backend(fn, kind="cpu", workers=None):
+    """Backend for fn: asyncio for coroutine functions, threads for I/O-bound and
+    processes for CPU-bound work (serial if there is only one worker).
+
+    Args:
+    - fn: Function to map.
+    - kind: "cpu" or "io". Default is "cpu".
+    - workers: Number of workers. Default is the CPU count.
+    """
+    if inspect.iscoroutinefunction(fn):
+        return "asyncio"
+    if kind == "io":
+        return "threads"
+    if kind != "cpu":
+        raise ValueError(f"kind must be 'cpu' or 'io', not {kind!r}")
+    return "processes" if (workers or os.cpu_count()) > 1 else "serial"
+
+
+def _chunks(items, chunksize):
+    """(start index, list of items) for consecutive chunks of an iterable."""
+    iterator = iter(items)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+# Shared result array of the pool this worker process belongs to
+_shared = {}
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared["shm"] = shm
+    _shared["out"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _run_chunk(fn, start, chunk, out=None):
+    """Apply fn to every item of a chunk.
+
+    Returns:
+    - (start, results, seconds): Results (None if written to out[start:]) and the time of every item.
+      out="shared" stands for the shared array attached by _attach.
+    """
+    results, seconds = [], []
+    for item in chunk:
+        begin = time.perf_counter()
+        results.append(fn(item))
+        seconds.append(time.perf_counter() - begin)
+    if out is not None:
+        target = _shared["out"] if isinstance(out, str) else out
+        target[start:start + len(results)] = results
+        results = None
+    return start, results, seconds
+
+
+async def _run_chunk_async(fn, start, chunk, out=None):
+    """_run_chunk on an event loop; plain functions run in the loop's default thread pool."""
+    is_coroutine = inspect.iscoroutinefunction(fn)
+    results, seconds = [], []
+    for item in chunk:
+        begin = time.perf_counter()
+        if is_coroutine:
+            results.append(await fn(item))
+        else:
+            results.append(await asyncio.to_thread(fn, item))
+        seconds.append(time.perf_counter() - begin)
+    if out is not None:
+        out[start:start + len(results)] = results
+        results = None
+    return start, results, seconds
+
+
+class _EventLoopExecutor:
+    """Executor-like event loop in a background thread, also usable inside a running loop (e.g. Jupyter).
+
+    submit(coroutine_function, *args) returns a concurrent.futures.Future, so
+    chunks are awaited with the same wait loop as the pool executors and
+    results are yielded as soon as their task completes.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        return asyncio.run_coroutine_threadsafe(fn(*args), self.loop)
+
+    async def _drain(self, cancel):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if cancel:
+            for task in tasks:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.loop.shutdown_default_executor()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        asyncio.run_coroutine_threadsafe(self._drain(cancel_futures), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class ParallelMap:
+    """Map a function over items with a process, thread, interpreter or asyncio backend.
+
+    Items are sent to the workers in chunks of chunksize, and at most
+    max_pending chunks are in flight: the input can be a generator, and a
+    slow consumer or a long input never piles up queued tasks or results.
+    Every task is timed inside its worker, see stats and report.
+
+    Results come back as return values (pickled for processes), or, with
+    map(items, out=array), are written into a NumPy array. For processes
+    that array lives in shared memory while the workers run, so nothing but
+    the timings goes through a pipe. Interpreters cannot share the array;
+    their results are returned and written into it by the caller.
+
+    The asyncio backend runs an event loop in a background thread, with at
+    most min(workers, max_pending) chunks in flight, and yields every chunk
+    as soon as it completes, like the other backends.
+
+    Args:
+    - fn: Function of one item. For processes it must be defined at module level; a coroutine
+      function runs on asyncio.
+    - backend: One of BACKENDS or "auto" (see choose_backend). Default is "auto".
+    - workers: Number of workers. Default is the CPU count for processes and interpreters and
+      min(32, CPU count + 4) for threads and asyncio.
+    - chunksize: Items per task sent to a worker. Default is 1.
+    - ordered: Results in the order of items; otherwise in order of completion. Default is True.
+    - max_pending: Chunks in flight. Default is 2 per worker.
+    - kind: "cpu" or "io", only used by backend="auto". Default is "cpu".
+    """
+
+    def __init__(self, fn, backend="auto", workers=None, chunksize=1, ordered=True, max_pending=None, kind="cpu"):
+        if backend == "auto":
+            backend = choose_backend(fn, kind, workers)
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be 'auto' or one of {BACKENDS}, not {backend!r}")
+        if backend == "interpreters" and not hasattr(concurrent.futures, "InterpreterPoolExecutor"):
+            raise ValueError("backend='interpreters' needs Python 3.14 or newer")
+        if backend == "serial":
+            workers = 1
+        elif backend in ("threads", "asyncio"):
+            workers = workers or min(32, os.cpu_count() + 4)
+        else:
+            workers = workers or os.cpu_count()
+
+        self.fn = fn
+        self.backend = backend
+        self.workers = workers
+        self.chunksize = max(1, int(chunksize))
+        self.ordered = ordered
+        self.max_pending = max_pending or PENDING_PER_WORKER * workers
+        self.stats = {"tasks": 0, "chunks": 0, "seconds": 0.0, "timings": []}
+
+    def _record(self, result, begin):
+        start, results, seconds = result
+        self.stats["tasks"] += len(seconds)
+        self.stats["chunks"] += 1
+        self.stats["seconds"] = time.perf_counter() - begin
+        self.stats["timings"].extend(zip(range(start, start + len(seconds)), seconds))
+        return start, results
+
+    def _execute(self, items, out=None):
+        """(start, results) per chunk in order of completion."""
+        self.stats = {"tasks": 0, "chunks": 0, "seconds": 0.0, "timings": []}
+        begin = time.perf_counter()
+
+        if self.backend == "serial":
+            for start, chunk in _chunks(items, self.chunksize):
+                yield self._record(_run_chunk(self.fn, start, chunk, out), begin)
+            return
+
+        shm, target, task, max_pending = None, out, _run_chunk, self.max_pending
+        if self.backend == "asyncio":
+            executor = _EventLoopExecutor()
+            task, max_pending = _run_chunk_async, min(self.workers, self.max_pending)
+        elif self.backend == "threads":
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+        elif self.backend == "interpreters":
+            # Interpreters do not share memory with the caller; their results are written into out here
+            executor = concurrent.futures.InterpreterPoolExecutor(max_workers=self.workers)
+            target = None
+        elif out is not None:
+            shm = shared_memory.SharedMemory(create=True, size=max(out.nbytes, 1))
+            target = "shared"
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_attach,
+                                           initargs=(shm.name, out.shape, out.dtype.str))
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        try:
+            chunks = _chunks(items, self.chunksize)
+            pending = set()
+            while True:
+                for start, chunk in itertools.islice(chunks, max_pending - len(pending)):
+                    pending.add(executor.submit(task, self.fn, start, chunk, target))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, results = self._record(future.result(), begin)
+                    if out is not None and target is None:
+                        out[start:start + len(results)] = results
+                        results = None
+                    yield start, results
+            if shm is not None:
+                shared = np.ndarray(out.shape, dtype=out.dtype, buffer=shm.buf)
+                out[...] = shared
+                del shared
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def imap(self, items):
+        """Generator of fn(item) for every item (in the order of items if ordered)."""
+        buffered, next_start = {}, 0
+        for start, results in self._execute(items):
+            if not self.ordered:
+                yield from results
+                continue
+            buffered[start] = results
+            while next_start in buffered:
+                results = buffered.pop(next_start)
+                next_start += len(results)
+                yield from results
+
+    def map(self, items, out=None):
+        """List of fn(item) for every item.
+
+        Args:
+        - items: Iterable of items.
+        - out: NumPy array with one row per item; if given, out[i] = fn(items[i]) and out is returned.
+        """
+        if out is None:
+            return list(self.imap(items))
+        for _ in self._execute(items, out):
+            pass
+        return out
+
+    @property
+    def task_seconds(self):
+        """Time of every task of the last map, in the order of items."""
+        timings = sorted(self.stats["timings"])
+        return np.array([seconds for _, seconds in timings])
+
+    @property
+    def utilization(self):
+        """Fraction of the wall time the workers spent inside fn."""
+        if not self.stats["seconds"]:
+            return 0.0
+        return sum(seconds for _, seconds in self.stats["timings"]) / (self.stats["seconds"] * self.workers)
+
+    def report(self):
+        seconds = self.task_seconds
+        mean, longest = (seconds.mean(), seconds.max()) if len(seconds) else (0.0, 0.0)
+        return (f"{self.stats['tasks']} tasks in {self.stats['chunks']} chunks, {self.stats['seconds']:.3f} s, "
+                f"task mean {mean * 1000:.1f} ms / max {longest * 1000:.1f} ms, "
+                f"{self.utilization:.0%} utilization ({self.workers} {self.backend})")
+
+
+def parallel_map(fn, items, backend="auto", chunksize=1, ordered=True, workers=None, max_pending=None,
+                 kind="cpu", out=None):
+    """[fn(item) for item in items] on the best backend; see ParallelMap for the arguments.
+
+    Example:
+    - parallel_map(find_primes, NUMBERS): CPU-bound, runs in a process pool.
+    - parallel_map(generate_and_save_file, file_paths, kind="io"): I/O-bound, runs in a thread pool.
+    """
+    return ParallelMap(fn, backend, workers, chunksize, ordered, max_pending, kind).map(items, out)
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+if __name__ == "__main__":
+    items = [200_000] * 64
+    for backend in ("serial", "processes", "threads"):
+        mapper = ParallelMap(_busy, backend, chunksize=4)
+        mapper.map(items)
+        print(f"CPU-bound, {backend}: {mapper.report()}")
+
+    delays = [0.02] * 64
+    for backend in ("serial", "threads", "asyncio"):
+        mapper = ParallelMap(_sleep, backend, kind="io")
+        mapper.map(delays)
+        print(f"I/O-bound, {backend}: {mapper.report()}")
+
+    out = np.zeros(len(items), dtype=np.int64)
+    start = time.time()
+    parallel_map(_busy, items, out=out, chunksize=4)
+    end = time.time()
+    print(f"Shared-memory results ({choose_backend(_busy)}): {end - start:.3f} seconds, "
+          f"all equal: {bool((out == _busy(items[0])).all())}")
@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Odd numbers per segment; one byte each while sieving, so a segment fits into L2 cache
+SEGMENT_SIZE = 1 << 18
+
+# Below this limit the sieve runs in the calling process
+PARALLEL_THRESHOLD = 1 << 22
+
+# Parameter grid of benchmark.py, in-process and on all cores
+BENCHMARKS = {"PrimeSieve": {"n": [1_000_000, 20_000_000], "workers": [1, None]}}
+
+
+def base_primes(limit):
+    """Odd primes <= limit from a small odd-only sieve."""
+    if limit < 3:
+        return np.array([], dtype=np.int64)
+    # Index i stands for the odd number 2 * i + 1
+    flags = np.ones((limit + 1) // 2, dtype=bool)
+    flags[0] = False
+    for i in range(1, (int(limit ** 0.5) - 1) // 2 + 1):
+        if flags[i]:
+            p = 2 * i + 1
+            flags[p * p // 2::p] = False
+    return 2 * np.flatnonzero(flags) + 1
+
+
+def sieve_segment(lo, hi, primes):
+    """Sieve the odd numbers 2*lo+1 ... 2*hi-1.
+
+    Args:
+    - lo, hi: Range of odd indices (index i stands for 2 * i + 1).
+    - primes: Odd base primes up to at least sqrt(2 * hi - 1).
+
+    Returns:
+    - (count, bits): Number of primes in the segment and the prime flags packed into bits
+      (little bit order, one bit per odd number).
+    """
+    flags = np.ones(hi - lo, dtype=bool)
+    first = 2 * lo + 1
+    last = 2 * hi - 1
+    for p in primes:
+        p = int(p)
+        if p * p > last:
+            break
+        # First odd multiple of p in the segment, but not below p * p
+        start = max(p * p, -(-first // p) * p)
+        if start % 2 == 0:
+            start += p
+        flags[(start - first) // 2::p] = False
+    if lo == 0:
+        flags[0] = False  # 1 is not a prime
+    return int(np.count_nonzero(flags)), np.packbits(flags, bitorder="little")
+
+
+def _sieve_segment(bounds, primes):
+    return sieve_segment(bounds[0], bounds[1], primes)
+
+
+class PrimeSieve:
+    """Segmented, odd-only sieve of Eratosthenes over [0, n].
+
+    Only odd numbers are stored, and only as bits, so the sieve of n = 20M takes
+    1.25 MB instead of the 160 MB of a Python list of n booleans. Multiples
+    are crossed off with NumPy slice assignment on cache-sized segments; the
+    segments are independent and are sieved in parallel by a process pool.
+    The per-segment prime counts are kept, so later queries up to n (count,
+    is_prime, primes) need no new sieving.
+
+    Args:
+    - n: Upper limit (inclusive).
+    - segment_size: Odd numbers per segment. Default is 2**18.
+    - workers: Number of processes. Default is the CPU count; small n are sieved in-process.
+    """
+
+    def __init__(self, n, segment_size=SEGMENT_SIZE, workers=None):
+        self.n = int(n)
+        # Segments are whole bytes of the packed bit array
+        self.segment_size = max(8, segment_size // 8 * 8)
+        n_odd = (self.n + 1) // 2
+        self.bounds = [(lo, min(lo + self.segment_size, n_odd)) for lo in range(0, n_odd, self.segment_size)]
+        primes = base_primes(int(self.n ** 0.5))
+
+        workers = workers or os.cpu_count()
+        if workers > 1 and self.n >= PARALLEL_THRESHOLD and len(self.bounds) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(self.bounds) // (4 * workers))
+                results = list(executor.map(_sieve_segment, self.bounds, [primes] * len(self.bounds),
+                                            chunksize=chunksize))
+        else:
+            results = [sieve_segment(lo, hi, primes) for lo, hi in self.bounds]
+
+        counts = np.array([count for count, _ in results], dtype=np.int64)
+        self.bits = np.concatenate([bits for _, bits in results]) if results else np.zeros(0, dtype=np.uint8)
+        # Number of odd primes before each segment
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def count(self, m=None):
+        """Number of primes <= m (default n); m must not exceed n."""
+        m = self.n if m is None else int(m)
+        if m > self.n:
+            raise ValueError(f"m={m} is larger than the sieve limit n={self.n}")
+        if m < 2:
+            return 0
+        k = (m + 1) // 2  # odd numbers <= m
+        segment, rest = divmod(k, self.segment_size)
+        lo = segment * self.segment_size // 8
+        partial = np.unpackbits(self.bits[lo:lo + -(-rest // 8)], count=rest, bitorder="little")
+        return int(self._offsets[segment] + np.count_nonzero(partial)) + 1  # + 1 for the prime 2
+
+    def is_prime(self, m):
+        m = int(m)
+        if m > self.n:
+            raise ValueError(f"m={m} is larger than the sieve limit n={self.n}")
+        if m < 2 or m % 2 == 0:
+            return m == 2
+        i = m // 2
+        return bool(self.bits[i // 8] >> (i % 8) & 1)
+
+    def primes(self, lo=0, hi=None):
+        """Array of the primes in [lo, hi] (default hi is n)."""
+        hi = self.n if hi is None else min(int(hi), self.n)
+        first, last = max(int(lo), 0) // 2, (hi + 1) // 2
+        flags = np.unpackbits(self.bits, count=last, bitorder="little")[first:]
+        primes = 2 * (np.flatnonzero(flags) + first) + 1
+        return np.concatenate([[2], primes]) if lo <= 2 <= hi else primes
+
+
+# Largest sieve built so far by count_primes(..., cache=True) in this process
+_shared = {}
+
+
+def count_primes(n, workers=None, cache=False):
+    """Number of primes <= n.
+
+    Args:
+    - n: Upper limit (inclusive).
+    - workers: Number of processes, see PrimeSieve.
+    - cache: Keep the sieve and answer later calls up to its n from it. Forked processes
+      inherit the cached sieve, so leave this off when timing the sieve. Default is False.
+    """
+    sieve = _shared.get("sieve") if cache else None
+    if sieve is None or sieve.n < n:
+        sieve = PrimeSieve(n, workers=workers)
+        if cache:
+            _shared["sieve"] = sieve
+    return sieve.count(n)
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    n = 20_000_000
+    for workers in (1, os.cpu_count()):
+        tracemalloc.start()
+        start = time.time()
+        sieve = PrimeSieve(n, workers=workers)
+        end = time.time()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"PrimeSieve({n}), {workers} workers: {sieve.count()} primes in {end - start:.3f} seconds, "
+              f"peak memory {peak / 2 ** 20:.1f} MB")
+
+    start = time.time()
+    counts = [count_primes(m, cache=True) for m in (20_000_000, 10_000_000, 5_000_000, 20_000_000)]
+    end = time.time()
+    print(f"Repeated queries {counts}: {end - start:.3f} seconds")
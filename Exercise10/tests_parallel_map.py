@@ -0,0 +1,69 @@
+import asyncio
+import time
+import unittest
+
+import numpy as np
+
+from parallel_map import ParallelMap, choose_backend, parallel_map
+
+BACKENDS = ("serial", "processes", "threads", "asyncio")
+
+
+def _square(x):
+    # Later items finish first, so completion order differs from item order
+    time.sleep(0.002 * (x % 4 == 0))
+    return x * x
+
+
+def _fail(x):
+    if x == 5:
+        raise ValueError(f"bad item {x}")
+    return x
+
+
+async def _square_async(x):
+    await asyncio.sleep(0.002 * (x % 4 == 0))
+    return x * x
+
+
+class TestParallelMap(unittest.TestCase):
+
+    def test_result_order(self):
+        expected = [x * x for x in range(23)]
+        for backend in BACKENDS:
+            for chunksize in (1, 4):
+                results = parallel_map(_square, (x for x in range(23)), backend=backend, chunksize=chunksize,
+                                       workers=2)
+                self.assertEqual(results, expected, msg=backend)
+                unordered = ParallelMap(_square, backend, workers=2, chunksize=chunksize, ordered=False)
+                self.assertEqual(sorted(unordered.map(range(23))), expected, msg=backend)
+                self.assertEqual(unordered.stats["tasks"], 23)
+            self.assertEqual(parallel_map(_square, [], backend=backend, workers=2), [])
+        self.assertEqual(parallel_map(_square_async, range(23), workers=3), expected)
+
+    def test_out(self):
+        for backend in BACKENDS:
+            out = np.zeros(19, dtype=np.int64)
+            result = parallel_map(_square, range(19), backend=backend, chunksize=3, workers=2, out=out)
+            self.assertIs(result, out)
+            np.testing.assert_array_equal(out, np.arange(19) ** 2, err_msg=backend)
+        out = np.zeros(19)
+        parallel_map(_square_async, range(19), backend="asyncio", out=out)
+        np.testing.assert_array_equal(out, np.arange(19) ** 2)
+
+    def test_exceptions(self):
+        for backend in BACKENDS:
+            with self.assertRaisesRegex(ValueError, "bad item 5", msg=backend):
+                parallel_map(_fail, range(10), backend=backend, workers=2)
+
+    def test_choose_backend(self):
+        self.assertEqual(choose_backend(_square_async), "asyncio")
+        self.assertEqual(choose_backend(_square, kind="io"), "threads")
+        self.assertEqual(choose_backend(_square, workers=1), "serial")
+        self.assertEqual(choose_backend(_square, workers=4), "processes")
+        with self.assertRaises(ValueError):
+            ParallelMap(_square, backend="gpu")
+
+
+if __name__ == "__main__":
+    unittest.main()
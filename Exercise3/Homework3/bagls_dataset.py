@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from bagls_loader import BaglsLoader, stack_if_uniform
+
+BAGLS_PATH = "Mini_BAGLS_dataset"
+CACHE_DIR = "__cache__"
+
+
+class BaglsDataset:
+    """Indexed access to a BAGLS folder (<id>.png, <id>_seg.png, <id>.meta).
+
+    The folder is scanned once on construction. Images and masks are decoded
+    on first pixel access into two flat uint8 files that are memory-mapped
+    afterwards, so every later read is a view into the cache and no PNG is
+    decoded twice. The cache is rebuilt when the PNG files change.
+
+    Args:
+    - path: Path to the dataset folder. Default is "Mini_BAGLS_dataset".
+    - cache_dir: Folder for the decoded cache. Default is <path>/__cache__.
+    """
+
+    def __init__(self, path=BAGLS_PATH, cache_dir=None):
+        self.path = path
+        self.cache_dir = cache_dir or os.path.join(path, CACHE_DIR)
+
+        # Scan the folder once and sort every file into its sample slot
+        entries = {}
+        for entry in os.scandir(path):
+            if not entry.is_file():
+                continue
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".png" and stem.endswith("_seg"):
+                kind, stem = "mask", stem[:-len("_seg")]
+            elif ext == ".png":
+                kind = "image"
+            elif ext == ".meta":
+                kind = "meta"
+            else:
+                continue
+            if not stem.isdigit():
+                continue
+            entries.setdefault(int(stem), {})[kind] = entry
+
+        self.ids = np.array(sorted(i for i, e in entries.items() if "image" in e), dtype=np.int64)
+        self._position = {int(sample_id): pos for pos, sample_id in enumerate(self.ids)}
+        self._paths = {}
+        signature = hashlib.sha1()
+        for sample_id in self.ids:
+            sample = entries[int(sample_id)]
+            self._paths[int(sample_id)] = tuple(
+                sample[kind].path if kind in sample else None for kind in ("image", "mask", "meta")
+            )
+            for kind in ("image", "mask"):
+                if kind in sample:
+                    stat = sample[kind].stat()
+                    signature.update(f"{sample[kind].name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        self._signature = signature.hexdigest()
+
+        self._meta = {}
+        self._cache = None
+
+    def __getstate__(self):
+        # Worker processes reopen the memory map instead of receiving a pickled copy of the cache
+        state = self.__dict__.copy()
+        state["_cache"] = None
+        return state
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, sample_id):
+        return sample_id in self._position
+
+    def __getitem__(self, idx):
+        """Return (image, mask) for a position, or a list of pairs for a slice."""
+        if isinstance(idx, slice):
+            return [self.pair(sample_id) for sample_id in self.ids[idx]]
+        return self.pair(self.ids[idx])
+
+    def paths(self, sample_id):
+        """Return the (image, mask, meta) file paths of a sample, None where missing."""
+        return self._paths[int(sample_id)]
+
+    def meta(self, sample_id):
+        """Return the parsed .meta dictionary of a sample (read once, then cached)."""
+        sample_id = int(sample_id)
+        if sample_id not in self._meta:
+            meta_path = self._paths[sample_id][2]
+            if meta_path is None:
+                self._meta[sample_id] = {}
+            else:
+                with open(meta_path) as f:
+                    self._meta[sample_id] = json.load(f)
+        return self._meta[sample_id]
+
+    def image(self, sample_id):
+        """Return the image of a sample as a read-only uint8 view into the cache."""
+        return self._view("image", sample_id)
+
+    def mask(self, sample_id):
+        """Return the segmentation mask of a sample, or None if it has no mask."""
+        return self._view("mask", sample_id)
+
+    def pair(self, sample_id):
+        return self.image(sample_id), self.mask(sample_id)
+
+    def batch(self, sample_ids):
+        """Read several samples at once.
+
+        Args:
+        - sample_ids: Iterable of sample ids.
+
+        Returns:
+        - (images, masks): Stacked arrays if all samples share one shape, lists otherwise.
+        """
+        images = [self.image(i) for i in sample_ids]
+        masks = [self.mask(i) for i in sample_ids]
+        return stack_if_uniform(images), stack_if_uniform(masks)
+
+    def sample(self, k, seed=None):
+        """Return k distinct random sample ids."""
+        rng = np.random.default_rng(seed)
+        return rng.choice(self.ids, size=k, replace=False)
+
+    def build_cache(self, force=False, workers=None):
+        """Decode every image and mask into the memory-mapped cache.
+
+        Args:
+        - force: Rebuild even if a cache for the current files exists.
+        - workers: Number of decoding threads. Default is the CPU count.
+        """
+        index_path = os.path.join(self.cache_dir, "index.npz")
+        if not force and os.path.exists(index_path):
+            index = np.load(index_path)
+            if str(index["signature"]) == self._signature:
+                self._cache = self._open_cache(index)
+                return
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Index arrays: byte offset into the flat file and the array shape (3 dims, -1 when unused)
+        columns = {}
+        for kind in ("image", "mask"):
+            columns[kind + "_offsets"] = np.full(len(self), -1, dtype=np.int64)
+            columns[kind + "_shapes"] = np.full((len(self), 3), -1, dtype=np.int64)
+        # Everything is written to temporary files first and moved into place when complete,
+        # index.npz last, so a crash or a concurrent build never leaves a truncated cache behind
+        suffix = f".{os.getpid()}.tmp"
+        paths = {kind: os.path.join(self.cache_dir, kind + "s.u8") for kind in ("image", "mask")}
+        files = {kind: open(paths[kind] + suffix, "wb") for kind in ("image", "mask")}
+        offset = {"image": 0, "mask": 0}
+        try:
+            pos = 0
+            for _, images, masks in BaglsLoader(self, batch_size=16, workers=workers, ordered=True):
+                for img, seg in zip(images, masks):
+                    for kind, arr in (("image", img), ("mask", seg)):
+                        if arr is None:
+                            continue
+                        arr = np.ascontiguousarray(arr, dtype=np.uint8)
+                        columns[kind + "_offsets"][pos] = offset[kind]
+                        columns[kind + "_shapes"][pos, :arr.ndim] = arr.shape
+                        files[kind].write(arr.tobytes())
+                        offset[kind] += arr.nbytes
+                    pos += 1
+        except BaseException:
+            for kind, f in files.items():
+                f.close()
+                os.remove(paths[kind] + suffix)
+            raise
+        finally:
+            for f in files.values():
+                f.close()
+
+        with open(index_path + suffix, "wb") as f:
+            np.savez(f, signature=self._signature, ids=self.ids, **columns)
+        # A stale index must not describe the new data files
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        for kind in ("image", "mask"):
+            os.replace(paths[kind] + suffix, paths[kind])
+        os.replace(index_path + suffix, index_path)
+        self._cache = self._open_cache(np.load(index_path))
+
+    def _open_cache(self, index):
+        cache = {key: index[key] for key in index.files}
+        for kind in ("image", "mask"):
+            file_path = os.path.join(self.cache_dir, kind + "s.u8")
+            # np.memmap refuses empty files, which happens if no sample has a mask
+            if os.path.getsize(file_path):
+                cache[kind] = np.memmap(file_path, dtype=np.uint8, mode="r")
+            else:
+                cache[kind] = np.zeros(0, dtype=np.uint8)
+        return cache
+
+    def _view(self, kind, sample_id):
+        if self._cache is None:
+            self.build_cache()
+        pos = self._position[int(sample_id)]
+        offset = self._cache[kind + "_offsets"][pos]
+        if offset < 0:
+            return None
+        shape = tuple(int(s) for s in self._cache[kind + "_shapes"][pos] if s >= 0)
+        return self._cache[kind][offset:offset + int(np.prod(shape))].reshape(shape)
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.time()
+    dataset = BaglsDataset()
+    dataset.build_cache()
+    end = time.time()
+    print(f"Indexed and cached {len(dataset)} samples in {end - start:.3f} seconds")
+
+    start = time.time()
+    for sample_id in dataset.ids:
+        img, seg = dataset.pair(sample_id)
+    end = time.time()
+    print(f"Read all samples from cache in {end - start:.4f} seconds")
@@ -0,0 +1,134 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import imageio.v2 as io
+import numpy as np
+
+
+def stack_if_uniform(arrays):
+    """Stack a list of arrays if they all share one shape, otherwise return the list."""
+    if arrays and all(a is not None for a in arrays) and len({a.shape for a in arrays}) == 1:
+        return np.stack(arrays)
+    return arrays
+
+
+def decode_pairs(pairs):
+    """Decode a list of (image_path, mask_path) pairs.
+
+    Args:
+    - pairs: List of (image_path, mask_path) tuples. mask_path may be None.
+
+    Returns:
+    - (images, masks): Lists of uint8 arrays, None for missing masks.
+    """
+    images, masks = [], []
+    for image_path, mask_path in pairs:
+        images.append(np.asarray(io.imread(image_path), dtype=np.uint8))
+        masks.append(None if mask_path is None else np.asarray(io.imread(mask_path), dtype=np.uint8))
+    return images, masks
+
+
+class BaglsLoader:
+    """Stream decoded image/mask batches of a BaglsDataset from a worker pool.
+
+    Each batch is decoded by one worker. At most `prefetch` batches are in
+    flight, so memory stays bounded while all workers keep decoding ahead of
+    the consumer.
+
+    Args:
+    - dataset: BaglsDataset (anything with .ids and .paths(id) works).
+    - batch_size: Number of samples per batch. Default is 32.
+    - workers: Number of decoding workers. Default is the CPU count.
+    - prefetch: Maximum number of batches in flight. Default is 2 * workers.
+    - ordered: Yield batches in dataset order. If False, batches are yielded as soon as they are done.
+    - processes: Use a process pool instead of a thread pool.
+    - ids: Subset of sample ids to load. Default is all ids of the dataset.
+    """
+
+    def __init__(self, dataset, batch_size=32, workers=None, prefetch=None, ordered=True,
+                 processes=False, ids=None):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count()
+        self.prefetch = prefetch or 2 * self.workers
+        self.ordered = ordered
+        self.processes = processes
+        self.ids = np.asarray(dataset.ids if ids is None else ids)
+        self.stats = {"samples": 0, "batches": 0, "seconds": 0.0}
+
+    def __len__(self):
+        return -(-len(self.ids) // self.batch_size)
+
+    def __iter__(self):
+        """Yield (ids, images, masks) per batch.
+
+        images and masks are stacked arrays if all samples of the batch share
+        one shape, lists of arrays otherwise.
+        """
+        batches = (self.ids[i:i + self.batch_size] for i in range(0, len(self.ids), self.batch_size))
+        executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        self.stats = {"samples": 0, "batches": 0, "seconds": 0.0}
+        start = time.perf_counter()
+
+        with executor_class(max_workers=self.workers) as executor:
+            pending = deque() if self.ordered else set()
+
+            def submit_next():
+                batch_ids = next(batches, None)
+                if batch_ids is None:
+                    return False
+                pairs = [self.dataset.paths(i)[:2] for i in batch_ids]
+                future = executor.submit(decode_pairs, pairs)
+                future.batch_ids = batch_ids
+                if self.ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+                return True
+
+            while len(pending) < self.prefetch and submit_next():
+                pass
+
+            while pending:
+                if self.ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    pending.difference_update(done)
+                for future in done:
+                    images, masks = future.result()
+                    submit_next()
+                    self.stats["samples"] += len(images)
+                    self.stats["batches"] += 1
+                    self.stats["seconds"] = time.perf_counter() - start
+                    yield future.batch_ids, stack_if_uniform(images), stack_if_uniform(masks)
+
+    @property
+    def throughput(self):
+        """Decoded samples per second of the last (or running) iteration."""
+        return self.stats["samples"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
+
+    def report(self):
+        return (f"{self.stats['samples']} samples in {self.stats['batches']} batches, "
+                f"{self.stats['seconds']:.3f} s, {self.throughput:.1f} samples/s "
+                f"({self.workers} {'processes' if self.processes else 'threads'})")
+
+
+if __name__ == "__main__":
+    from bagls_dataset import BaglsDataset
+
+    dataset = BaglsDataset()
+
+    start = time.time()
+    decode_pairs([dataset.paths(i)[:2] for i in dataset.ids])
+    end = time.time()
+    print(f"Single thread: {len(dataset) / (end - start):.1f} samples/s")
+
+    for ordered in (True, False):
+        for processes in (False, True):
+            loader = BaglsLoader(dataset, batch_size=8, ordered=ordered, processes=processes)
+            for batch_ids, images, masks in loader:
+                pass
+            print(f"{'Ordered' if ordered else 'Unordered'}: {loader.report()}")
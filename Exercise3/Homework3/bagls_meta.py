@@ -0,0 +1,188 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bagls_dataset import BAGLS_PATH, CACHE_DIR
+
+# Column name -> (.meta key, dtype). Text columns are stored as int16 codes into a category list.
+FIELDS = {
+    "video_id": ("Video Id", np.int32),
+    "camera": ("Camera", "category"),
+    "sampling_rate": ("Sampling rate (Hz)", np.int32),
+    "height": ("Video resolution (px, HxW)", np.int16),
+    "width": ("Video resolution (px, HxW)", np.int16),
+    "sex": ("Subject sex", "category"),
+    "disorder": ("Subject disorder status", "category"),
+    "segmenter": ("Segmenter", np.int8),
+    "post_processed": ("Post-processed", np.int8),
+}
+CATEGORIES = [name for name, (_, dtype) in FIELDS.items() if dtype == "category"]
+DTYPE = np.dtype(
+    [("id", np.int64), ("mtime_ns", np.int64)]
+    + [(name, np.int16 if dtype == "category" else dtype) for name, (_, dtype) in FIELDS.items()]
+)
+
+
+def parse_meta(file_path):
+    """Read one .meta file and return its values keyed by column name.
+
+    Missing numbers become -1 and missing text becomes "".
+    """
+    with open(file_path) as f:
+        meta = json.load(f)
+    resolution = meta.get("Video resolution (px, HxW)") or [-1, -1]
+    row = {}
+    for name, (key, dtype) in FIELDS.items():
+        if name == "height":
+            row[name] = resolution[0]
+        elif name == "width":
+            row[name] = resolution[1]
+        elif dtype == "category":
+            row[name] = str(meta.get(key) or "").strip()
+        else:
+            value = meta.get(key)
+            row[name] = -1 if value is None else value
+    # The sex column mixes "w" and "W"
+    row["sex"] = row["sex"].lower()
+    return row
+
+
+class BaglsMetaIndex:
+    """Columnar index over all .meta files of a BAGLS folder.
+
+    The .meta files are parsed once in a thread pool and stored as a NumPy
+    structured array in the cache folder. Later runs only re-parse files
+    whose mtime changed, so queries never open the small JSON files again.
+
+    Args:
+    - path: Path to the dataset folder. Default is "Mini_BAGLS_dataset".
+    - cache_dir: Folder for the index file. Default is <path>/__cache__.
+    - workers: Number of parser threads. Default is the CPU count.
+    """
+
+    def __init__(self, path=BAGLS_PATH, cache_dir=None, workers=None):
+        self.path = path
+        self.cache_dir = cache_dir or os.path.join(path, CACHE_DIR)
+        self.workers = workers or os.cpu_count()
+        self.table = np.zeros(0, dtype=DTYPE)
+        self.categories = {name: [] for name in CATEGORIES}
+        self._load()
+        self.refresh()
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def ids(self):
+        return self.table["id"]
+
+    def refresh(self):
+        """Re-parse new or modified .meta files and drop deleted ones.
+
+        Returns:
+        - int: Number of files that were parsed.
+        """
+        mtimes = {}
+        for entry in os.scandir(self.path):
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".meta" and stem.isdigit() and entry.is_file():
+                mtimes[int(stem)] = entry.stat().st_mtime_ns
+
+        known = dict(zip(self.table["id"].tolist(), self.table["mtime_ns"].tolist()))
+        stale = sorted(i for i, mtime in mtimes.items() if known.get(i) != mtime)
+        if not stale and len(known) == len(mtimes):
+            return 0
+
+        paths = [os.path.join(self.path, f"{i}.meta") for i in stale]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            rows = list(executor.map(parse_meta, paths))
+
+        fresh = np.zeros(len(stale), dtype=DTYPE)
+        fresh["id"] = stale
+        fresh["mtime_ns"] = [mtimes[i] for i in stale]
+        for name in FIELDS:
+            values = [row[name] for row in rows]
+            fresh[name] = [self._code(name, v) for v in values] if name in CATEGORIES else values
+
+        keep = np.isin(self.table["id"], list(mtimes)) & ~np.isin(self.table["id"], stale)
+        table = np.concatenate([self.table[keep], fresh])
+        self.table = table[np.argsort(table["id"], kind="stable")]
+        self._save()
+        return len(stale)
+
+    def query(self, **conditions):
+        """Return the sample ids whose columns match all conditions.
+
+        A condition value may be a single value or a list of accepted values,
+        e.g. query(disorder="healthy", post_processed=1, sampling_rate=4000).
+        """
+        selected = np.ones(len(self.table), dtype=bool)
+        for name, value in conditions.items():
+            if name not in FIELDS:
+                raise KeyError(f"Unknown metadata column: {name}")
+            values = value if isinstance(value, (list, tuple, set, np.ndarray)) else [value]
+            if name in CATEGORIES:
+                lookup = {c: code for code, c in enumerate(self.categories[name])}
+                values = [lookup[v] for v in values if v in lookup]
+            if len(values) == 1:
+                selected &= self.table[name] == values[0]
+            else:
+                selected &= np.isin(self.table[name], values)
+        return self.table["id"][selected]
+
+    def column(self, name):
+        """Return one column for all samples, with text columns decoded to strings."""
+        if name in CATEGORIES:
+            return np.array(self.categories[name] or [""])[self.table[name]]
+        return self.table[name]
+
+    def record(self, sample_id):
+        """Return all columns of one sample as a dictionary."""
+        pos = np.searchsorted(self.table["id"], sample_id)
+        if pos == len(self.table) or self.table["id"][pos] != sample_id:
+            raise KeyError(sample_id)
+        row = self.table[pos]
+        return {
+            name: self.categories[name][row[name]] if name in CATEGORIES else row[name].item()
+            for name in FIELDS
+        }
+
+    def _code(self, name, value):
+        categories = self.categories[name]
+        if value not in categories:
+            categories.append(value)
+        return categories.index(value)
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "meta_index.npz")
+
+    def _load(self):
+        if not os.path.exists(self._index_path()):
+            return
+        index = np.load(self._index_path())
+        if index["table"].dtype != DTYPE:
+            return
+        self.table = index["table"]
+        self.categories = {name: index[name].tolist() for name in CATEGORIES}
+
+    def _save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        categories = {name: np.array(values, dtype=str) for name, values in self.categories.items()}
+        np.savez(self._index_path(), table=self.table, **categories)
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.time()
+    meta_index = BaglsMetaIndex()
+    end = time.time()
+    print(f"Indexed {len(meta_index)} .meta files in {end - start:.4f} seconds")
+
+    start = time.perf_counter()
+    healthy = meta_index.query(disorder="healthy", post_processed=1, sampling_rate=4000)
+    end = time.perf_counter()
+    print(f"{len(healthy)} healthy, post-processed 4000 Hz samples found in {(end - start) * 1e6:.1f} us")
+    print(healthy)
@@ -1,43 +1,34 @@
-import glob
-import random
 import matplotlib.pyplot as plt
-import imageio.v2 as io
-import json 
 import cv2
-import numpy as np
 
-BAGLS_PATH = "Mini_BAGLS_dataset"
+from bagls_dataset import BaglsDataset, BAGLS_PATH
+from bagls_meta import BaglsMetaIndex
+from grayscale import to_grayscale
 
 ''' 
 Task 1: get four arbitrary images and their corresponding segmentation masks and metadata
 '''
-selected_files = []  # List to collect file paths
+dataset = BaglsDataset(BAGLS_PATH)  # Scan the dataset folder once and index image, mask and meta per id
 
-for i in range(4):
-    fileNum = random.randint(10, 99)  # Pick a random image number between 10 and 99 
-    files = glob.glob(BAGLS_PATH + "/*" + str(fileNum) + "*")  # Find the corresponding data files to the picked image number
-    selected_files.append(files)  # Add image and mask files to the list
+selected_ids = dataset.sample(4)  # Pick four distinct random image numbers
+selected_files = [dataset.paths(i) for i in selected_ids]  # (image, mask, meta) paths of the picked images
 
 print(selected_files)
 
 '''
 Task 2: Create a plot to display all images and their corresponding segmentation masks 
 '''
+meta_index = BaglsMetaIndex(BAGLS_PATH)  # Columnar index over all .meta files, only re-parsed when they change
 meta_info = []  # List to collect metadata info (subject disorder status)
 fig, axes = plt.subplots(2, 2, figsize=(10, 5))  # Create a 2x2 grid for displaying the images
 
 # Flatten axes for easy iteration
 axes = axes.flatten()
 
-for i, file in enumerate(selected_files):
-    meta = file[0]
-    # Read the .meta file
-    with open(meta) as f:
-        meta_data = json.load(f)
-    disorder_status = meta_data.get('Subject disorder status', 'Unknown') # Extract the disorder status
+for i, sample_id in enumerate(selected_ids):
+    disorder_status = meta_index.record(sample_id)["disorder"] or 'Unknown' # Look up the disorder status in the metadata index
     meta_info.append(disorder_status)  # Add the disorder status to the metadata list
-    img = io.imread(file[1])  # Read the image (second file in the list)
-    seg = io.imread(file[2])  # Read the segmentation mask (third file in the list)
+    img, seg = dataset.pair(sample_id)  # Read the image and its segmentation mask from the decoded cache
     
     ax = axes[i]  # Get the current axis to plot on
     ax.axis("off")  # Turn off the axis
@@ -66,19 +57,19 @@ axes[0].axis("off")
 axes[0].set_title("Original")  
 
 # Lightness method
-img_lightness = (np.max(img_rgb, axis=2) + np.min(img_rgb, axis=2)) / 2
+img_lightness = to_grayscale(img_rgb, method="lightness")
 axes[1].imshow(img_lightness, cmap="gray")
 axes[1].axis("off")
 axes[1].set_title("Lightness Method")
 
 # Average method
-img_average = np.mean(img_rgb, axis=2)
+img_average = to_grayscale(img_rgb, method="average")
 axes[2].imshow(img_average, cmap="gray")
 axes[2].axis("off")
 axes[2].set_title("Average Method")
 
 # Luminosity method
-img_luminosity = (img_rgb[:, :, 0] * 0.2989) + (img_rgb[:, :, 1] * 0.587) + (img_rgb[:, :, 2] * 0.1140) 
+img_luminosity = to_grayscale(img_rgb, method="luminosity")
 axes[3].imshow(img_luminosity, cmap="gray")
 axes[3].axis("off")
 axes[3].set_title("Luminosity Method")
@@ -0,0 +1,150 @@
+import numpy as np
+
+METHODS = ("lightness", "average", "luminosity")
+
+# Luminosity weights 0.2989, 0.587, 0.114 in 8 bit fixed point (they sum to 256, so r*77 + g*150 + b*29 fits uint16)
+LUMINOSITY_WEIGHTS = (77, 150, 29)
+LUMINOSITY_WEIGHTS_FLOAT = (0.2989, 0.587, 0.1140)
+
+# Pixels per tile: 64k pixels keep the input tile and the two uint16 scratch buffers within L2 cache
+TILE_PIXELS = 1 << 16
+
+
+def to_grayscale(images, method="luminosity", out=None, tile_pixels=TILE_PIXELS):
+    """Convert one RGB image or a batch of RGB images to grayscale.
+
+    uint8 input is converted in 8 bit fixed point arithmetic on uint16
+    scratch buffers and returns uint8 (results are rounded, so they differ
+    from the float formulas by at most 1). Any other input is converted in
+    float32. The work is done tile by tile, so the extra memory is bounded by
+    the tile size regardless of the number of images. Non-contiguous input
+    (e.g. a BGR to RGB view images[..., ::-1]) is copied tile by tile, in
+    tiles of whole image rows.
+
+    Args:
+    - images: Array of shape (H, W, 3) or (N, H, W, 3).
+    - method: "lightness", "average" or "luminosity". Default is "luminosity".
+    - out: Optional contiguous output array of shape images.shape[:-1].
+    - tile_pixels: Number of pixels converted per tile.
+
+    Returns:
+    - np.ndarray: Grayscale image(s) of shape images.shape[:-1].
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', choose one of {METHODS}")
+    images = np.asarray(images)
+    if images.ndim not in (3, 4) or images.shape[-1] != 3:
+        raise ValueError(f"Expected shape (H, W, 3) or (N, H, W, 3), got {images.shape}")
+
+    integer = images.dtype == np.uint8
+    out_dtype = np.uint8 if integer else np.float32
+    if out is None:
+        out = np.empty(images.shape[:-1], dtype=out_dtype)
+    elif out.shape != images.shape[:-1] or out.dtype != out_dtype or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a contiguous {np.dtype(out_dtype).name} array of shape {images.shape[:-1]}")
+
+    convert = _convert_integer if integer else _convert_float
+    scratch_dtype = np.uint16 if integer else np.float32
+
+    if images.flags.c_contiguous:
+        pixels = images.reshape(-1, 3)
+        flat_out = out.reshape(-1)
+        acc = np.empty(min(tile_pixels, len(pixels)), dtype=scratch_dtype)
+        tmp = np.empty_like(acc)
+        for start in range(0, len(pixels), tile_pixels):
+            tile = pixels[start:start + tile_pixels]
+            n = len(tile)
+            convert(tile, method, acc[:n], tmp[:n], flat_out[start:start + n])
+        return out
+
+    # Views (crops, images[..., ::-1], ...): tiles of whole rows, each copied to a contiguous buffer on its own
+    frames = images.reshape((-1,) + images.shape[-3:])
+    out_frames = out.reshape(frames.shape[:-1])
+    height, width = frames.shape[1:3]
+    rows = max(1, tile_pixels // max(width, 1))
+    acc = np.empty(min(rows, height) * width, dtype=scratch_dtype)
+    tmp = np.empty_like(acc)
+    for frame, frame_out in zip(frames, out_frames):
+        for start in range(0, height, rows):
+            tile = np.ascontiguousarray(frame[start:start + rows]).reshape(-1, 3)
+            n = len(tile)
+            convert(tile, method, acc[:n], tmp[:n], frame_out[start:start + rows].reshape(-1))
+    return out
+
+
+def _convert_integer(tile, method, acc, tmp, out):
+    r, g, b = tile[:, 0], tile[:, 1], tile[:, 2]
+    if method == "lightness":
+        # (max + min + 1) // 2, using out as uint8 scratch for max and min
+        np.maximum(r, g, out=out)
+        np.maximum(out, b, out=out)
+        np.add(out, np.uint16(1), out=acc)
+        np.minimum(r, g, out=out)
+        np.minimum(out, b, out=out)
+        np.add(acc, out, out=acc)
+        np.right_shift(acc, 1, out=acc)
+    elif method == "average":
+        # (2 * (r + g + b) + 3) // 6 rounds the mean and fits uint16
+        np.add(r, np.uint16(0), out=acc)
+        np.add(acc, g, out=acc)
+        np.add(acc, b, out=acc)
+        np.left_shift(acc, 1, out=acc)
+        np.add(acc, np.uint16(3), out=acc)
+        np.floor_divide(acc, np.uint16(6), out=acc)
+    else:
+        wr, wg, wb = (np.uint16(w) for w in LUMINOSITY_WEIGHTS)
+        np.multiply(r, wr, out=acc)
+        np.multiply(g, wg, out=tmp)
+        np.add(acc, tmp, out=acc)
+        np.multiply(b, wb, out=tmp)
+        np.add(acc, tmp, out=acc)
+        # Round before dropping the 8 fractional bits; 255 * 256 + 128 still fits uint16
+        np.add(acc, np.uint16(128), out=acc)
+        np.right_shift(acc, 8, out=acc)
+    np.copyto(out, acc, casting="unsafe")
+
+
+def _convert_float(tile, method, acc, tmp, out):
+    r, g, b = tile[:, 0], tile[:, 1], tile[:, 2]
+    if method == "lightness":
+        np.maximum(r, g, out=acc)
+        np.maximum(acc, b, out=acc)
+        np.minimum(r, g, out=tmp)
+        np.minimum(tmp, b, out=tmp)
+        np.add(acc, tmp, out=acc)
+        np.multiply(acc, np.float32(0.5), out=out)
+    elif method == "average":
+        np.add(r, g, out=acc)
+        np.add(acc, b, out=acc)
+        np.divide(acc, np.float32(3), out=out)
+    else:
+        wr, wg, wb = (np.float32(w) for w in LUMINOSITY_WEIGHTS_FLOAT)
+        np.multiply(r, wr, out=acc)
+        np.multiply(g, wg, out=tmp)
+        np.add(acc, tmp, out=acc)
+        np.multiply(b, wb, out=tmp)
+        np.add(acc, tmp, out=out)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    video = rng.integers(0, 256, size=(500, 512, 256, 3), dtype=np.uint8)
+    out = np.empty(video.shape[:-1], dtype=np.uint8)
+
+    for method in METHODS:
+        start = time.time()
+        if method == "lightness":
+            (np.max(video, axis=3) + np.min(video, axis=3)) / 2
+        elif method == "average":
+            np.mean(video, axis=3)
+        else:
+            (video[..., 0] * 0.2989) + (video[..., 1] * 0.587) + (video[..., 2] * 0.1140)
+        end = time.time()
+        naive = end - start
+
+        start = time.time()
+        to_grayscale(video, method, out=out)
+        end = time.time()
+        print(f"{method}: float64 {naive:.3f} s, fixed point {end - start:.3f} s")
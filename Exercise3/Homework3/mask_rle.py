@@ -0,0 +1,185 @@
+import os
+
+import numpy as np
+
+from bagls_loader import BaglsLoader
+
+
+class RLEMask:
+    """Binary mask stored as foreground runs of the row-major flattened image.
+
+    Args:
+    - shape: (H, W) of the mask.
+    - runs: int array of shape (K, 2) with sorted, disjoint [start, end) pixel ranges.
+    """
+
+    def __init__(self, shape, runs):
+        self.shape = tuple(int(s) for s in shape)
+        self.runs = np.asarray(runs, dtype=np.int64).reshape(-1, 2)
+
+    @classmethod
+    def encode(cls, mask):
+        """Encode a dense mask; every nonzero pixel is foreground."""
+        mask = np.asarray(mask)
+        flat = np.zeros(mask.size + 2, dtype=np.int8)
+        flat[1:-1] = mask.reshape(-1) > 0
+        edges = np.diff(flat)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        return cls(mask.shape[:2], np.stack([starts, ends], axis=1))
+
+    def decode(self):
+        """Return the dense uint8 mask (0 or 255)."""
+        # Alternating background and foreground segments: [0, s0), [s0, e0), [e0, s1), ..., [e_last, size)
+        bounds = np.concatenate([[0], self.runs.reshape(-1), [int(np.prod(self.shape))]])
+        values = np.zeros(len(bounds) - 1, dtype=np.uint8)
+        values[1::2] = 255
+        return np.repeat(values, np.diff(bounds)).reshape(self.shape)
+
+    @property
+    def area(self):
+        return int(np.sum(self.runs[:, 1] - self.runs[:, 0]))
+
+    def __len__(self):
+        return len(self.runs)
+
+
+def intersection(mask1, mask2):
+    """Number of pixels that are foreground in both RLE masks.
+
+    Run boundaries of both masks are merged as +1/-1 events. Between two
+    consecutive events the coverage is 2 exactly where both masks overlap,
+    so the cost depends on the number of runs, not on the number of pixels.
+    """
+    if mask1.shape != mask2.shape:
+        raise ValueError(f"Mask shapes differ: {mask1.shape} and {mask2.shape}")
+    if not len(mask1) or not len(mask2):
+        return 0
+    positions = np.concatenate([mask1.runs.reshape(-1), mask2.runs.reshape(-1)])
+    deltas = np.tile([1, -1], len(mask1) + len(mask2))
+    order = np.argsort(positions, kind="stable")
+    coverage = np.cumsum(deltas[order])[:-1]
+    segments = np.diff(positions[order])
+    return int(np.sum(segments[coverage == 2]))
+
+
+def mask_iou(mask1, mask2):
+    """IoU of two RLE masks. Two empty masks have an IoU of 1."""
+    overlap = intersection(mask1, mask2)
+    union = mask1.area + mask2.area - overlap
+    return overlap / union if union else 1.0
+
+
+def mask_dice(mask1, mask2):
+    """Dice coefficient of two RLE masks. Two empty masks have a Dice of 1."""
+    total = mask1.area + mask2.area
+    return 2 * intersection(mask1, mask2) / total if total else 1.0
+
+
+class MaskStore:
+    """On-disk store of RLE masks keyed by sample id.
+
+    A store folder holds runs.npy with the runs of all masks back to back
+    (memory-mapped on load) and index.npz with ids, shapes and run offsets.
+
+    Args:
+    - path: Folder of an existing store, see MaskStore.write and MaskStore.from_dataset.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        index = np.load(os.path.join(path, "index.npz"))
+        self.ids = index["ids"]
+        self.shapes = index["shapes"]
+        self.offsets = index["offsets"]
+        self.runs = np.load(os.path.join(path, "runs.npy"), mmap_mode="r")
+        self._position = {int(sample_id): pos for pos, sample_id in enumerate(self.ids)}
+
+    @staticmethod
+    def write(path, items):
+        """Encode masks and write them as a store.
+
+        Args:
+        - path: Folder of the store, created if needed.
+        - items: Iterable of (sample_id, mask) with dense or RLEMask masks.
+
+        Returns:
+        - MaskStore: The written store.
+        """
+        os.makedirs(path, exist_ok=True)
+        ids, shapes, runs = [], [], []
+        for sample_id, mask in items:
+            rle = mask if isinstance(mask, RLEMask) else RLEMask.encode(mask)
+            ids.append(sample_id)
+            shapes.append(rle.shape)
+            runs.append(rle.runs.astype(np.int32))
+        offsets = np.zeros(len(runs) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(r) for r in runs])
+        all_runs = np.concatenate(runs) if runs else np.zeros((0, 2), dtype=np.int32)
+        np.save(os.path.join(path, "runs.npy"), all_runs)
+        np.savez(os.path.join(path, "index.npz"), ids=np.asarray(ids, dtype=np.int64),
+                 shapes=np.asarray(shapes, dtype=np.int64).reshape(-1, 2), offsets=offsets)
+        return MaskStore(path)
+
+    @staticmethod
+    def from_dataset(dataset, path, workers=None):
+        """Encode all _seg.png masks of a BaglsDataset, decoding them in parallel."""
+        def masks():
+            for batch_ids, _, batch_masks in BaglsLoader(dataset, workers=workers):
+                for sample_id, mask in zip(batch_ids, batch_masks):
+                    if mask is not None:
+                        yield int(sample_id), mask
+        return MaskStore.write(path, masks())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, sample_id):
+        return int(sample_id) in self._position
+
+    def __getitem__(self, sample_id):
+        pos = self._position[int(sample_id)]
+        return RLEMask(self.shapes[pos], self.runs[self.offsets[pos]:self.offsets[pos + 1]])
+
+    def areas(self):
+        """Foreground area of every mask, in the order of self.ids."""
+        lengths = self.runs[:, 1].astype(np.int64) - self.runs[:, 0]
+        sums = np.concatenate([[0], np.cumsum(lengths)])
+        return sums[self.offsets[1:]] - sums[self.offsets[:-1]]
+
+    def evaluate(self, predictions):
+        """Compare predicted masks against this store as ground truth.
+
+        Args:
+        - predictions: MaskStore (or mapping of id -> RLEMask) with the predicted masks.
+
+        Returns:
+        - (ids, iou, dice): Arrays over the ids present in both.
+        """
+        ids = np.array([i for i in self.ids if int(i) in predictions], dtype=np.int64)
+        ious = np.empty(len(ids))
+        dices = np.empty(len(ids))
+        for n, sample_id in enumerate(ids):
+            truth, prediction = self[sample_id], predictions[int(sample_id)]
+            ious[n] = mask_iou(truth, prediction)
+            dices[n] = mask_dice(truth, prediction)
+        return ids, ious, dices
+
+
+if __name__ == "__main__":
+    import time
+
+    from bagls_dataset import BaglsDataset, BAGLS_PATH, CACHE_DIR
+
+    dataset = BaglsDataset()
+    start = time.time()
+    store = MaskStore.from_dataset(dataset, os.path.join(BAGLS_PATH, CACHE_DIR, "masks_rle"))
+    end = time.time()
+    dense_bytes = sum(int(np.prod(shape)) for shape in store.shapes)
+    print(f"Encoded {len(store)} masks in {end - start:.3f} seconds: "
+          f"{store.runs.nbytes} bytes of runs instead of {dense_bytes} dense bytes")
+
+    start = time.time()
+    ids, ious, dices = store.evaluate(store)
+    end = time.time()
+    print(f"IoU/Dice of {len(ids)} mask pairs in {end - start:.4f} seconds, mean IoU {ious.mean():.3f}")
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import imageio.v2 as io
+import numpy as np
+
+import bagls_dataset
+from bagls_dataset import BaglsDataset, BAGLS_PATH
+
+
+class TestBaglsDataset(unittest.TestCase):
+
+    def setUp(self):
+        # Work on a small copy so the cache and file changes stay local to the test
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "bagls")
+        os.mkdir(self.path)
+        for sample_id in (1, 10, 21):
+            for suffix in (".png", "_seg.png", ".meta"):
+                shutil.copy(os.path.join(BAGLS_PATH, f"{sample_id}{suffix}"), self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_index_matches_exact_ids(self):
+        dataset = BaglsDataset(self.path)
+        self.assertEqual(list(dataset.ids), [1, 10, 21])
+        self.assertEqual(dataset.paths(1)[0], os.path.join(self.path, "1.png"))
+        self.assertEqual(dataset.paths(1)[1], os.path.join(self.path, "1_seg.png"))
+
+    def test_cached_pixels_match_png(self):
+        dataset = BaglsDataset(self.path)
+        for sample_id in dataset.ids:
+            img, seg = dataset.pair(sample_id)
+            image_path, mask_path, _ = dataset.paths(sample_id)
+            np.testing.assert_array_equal(img, io.imread(image_path))
+            np.testing.assert_array_equal(seg, io.imread(mask_path))
+
+    def test_cache_rebuilds_on_change(self):
+        BaglsDataset(self.path).build_cache()
+        replacement = np.zeros((4, 6, 3), dtype=np.uint8)
+        io.imwrite(os.path.join(self.path, "10.png"), replacement)
+        os.utime(os.path.join(self.path, "10.png"), ns=(0, 0))
+        np.testing.assert_array_equal(BaglsDataset(self.path).image(10), replacement)
+
+    def test_interrupted_rebuild_keeps_cache(self):
+        BaglsDataset(self.path).build_cache()
+
+        def failing_loader(*args, **kwargs):
+            yield from []
+            raise RuntimeError("interrupted")
+
+        original = bagls_dataset.BaglsLoader
+        bagls_dataset.BaglsLoader = failing_loader
+        try:
+            with self.assertRaises(RuntimeError):
+                BaglsDataset(self.path).build_cache(force=True)
+        finally:
+            bagls_dataset.BaglsLoader = original
+
+        cache_dir = os.path.join(self.path, "__cache__")
+        self.assertEqual(sorted(os.listdir(cache_dir)), ["images.u8", "index.npz", "masks.u8"])
+        np.testing.assert_array_equal(BaglsDataset(self.path).image(21), io.imread(os.path.join(self.path, "21.png")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from mask_rle import MaskStore, RLEMask, intersection, mask_dice, mask_iou
+
+
+class TestMaskRLE(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        single = np.zeros((5, 7), dtype=np.uint8)
+        single[2, 3] = 255
+        corners = np.zeros((5, 7), dtype=np.uint8)
+        corners[0, 0] = corners[-1, -1] = 255
+        for mask in [np.zeros((5, 7), dtype=np.uint8), np.full((5, 7), 255, dtype=np.uint8), single, corners,
+                     (rng.random((32, 48)) > 0.5).astype(np.uint8) * 255]:
+            rle = RLEMask.encode(mask)
+            np.testing.assert_array_equal(rle.decode(), mask)
+            self.assertEqual(rle.area, np.count_nonzero(mask))
+        self.assertEqual(len(RLEMask.encode(np.zeros((5, 7)))), 0)
+        self.assertEqual(len(RLEMask.encode(single)), 1)
+
+    def test_metrics_match_numpy(self):
+        rng = np.random.default_rng(1)
+        for density in (0.1, 0.5, 0.9):
+            a = rng.random((40, 30)) < density
+            b = rng.random((40, 30)) < density
+            rle_a, rle_b = RLEMask.encode(a), RLEMask.encode(b)
+            overlap = np.count_nonzero(a & b)
+            self.assertEqual(intersection(rle_a, rle_b), overlap)
+            self.assertAlmostEqual(mask_iou(rle_a, rle_b), overlap / np.count_nonzero(a | b))
+            self.assertAlmostEqual(mask_dice(rle_a, rle_b), 2 * overlap / (a.sum() + b.sum()))
+        empty = RLEMask.encode(np.zeros((3, 3)))
+        self.assertEqual(mask_iou(empty, empty), 1.0)
+        with self.assertRaises(ValueError):
+            intersection(empty, RLEMask.encode(np.zeros((3, 4))))
+
+    def test_store_lookup(self):
+        rng = np.random.default_rng(2)
+        masks = {sample_id: (rng.random((8 + sample_id, 9)) > 0.6).astype(np.uint8) * 255
+                 for sample_id in (3, 17, 4)}
+        masks[5] = np.zeros((6, 6), dtype=np.uint8)
+        store = MaskStore.write(os.path.join(self.tmp, "store"), masks.items())
+        self.assertEqual(len(store), 4)
+        self.assertIn(17, store)
+        self.assertNotIn(1, store)
+        for sample_id, mask in masks.items():
+            np.testing.assert_array_equal(store[sample_id].decode(), mask)
+        np.testing.assert_array_equal(store.areas(), [np.count_nonzero(masks[i]) for i in store.ids])
+        ids, ious, dices = store.evaluate(MaskStore(store.path))
+        self.assertEqual(sorted(ids), [3, 4, 5, 17])
+        np.testing.assert_array_equal(ious, 1.0)
+        np.testing.assert_array_equal(dices, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
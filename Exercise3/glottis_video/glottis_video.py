@@ -0,0 +1,168 @@
+import importlib.util
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+VIDEO_PATH = "glottis_video.mp4"
+
+# to_grayscale lives next to the BAGLS homework
+GRAYSCALE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Homework3", "grayscale.py")
+
+STATS_DTYPE = np.dtype([
+    ("frame", np.int64),
+    ("mean_intensity", np.float32),
+    ("glottal_area", np.int32),
+])
+
+
+def _load_to_grayscale(path=GRAYSCALE_PATH):
+    """to_grayscale from its file, without adding the homework folder to sys.path."""
+    spec = importlib.util.spec_from_file_location("grayscale", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.to_grayscale
+
+
+to_grayscale = _load_to_grayscale()
+
+
+def frame_count(path):
+    """Return the number of frames the video container reports (an estimate for many codecs)."""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Cannot open video '{path}'")
+    n_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+    return n_frames
+
+
+def read_frames(path, chunk_size=256, prefetch=4):
+    """Decode a video in chunks on a background thread.
+
+    At most `prefetch` decoded chunks wait in the queue, so memory stays at
+    roughly (prefetch + 2) * chunk_size frames no matter how long the video is.
+
+    Args:
+    - path: Path to the video file.
+    - chunk_size: Number of frames per chunk. Default is 256.
+    - prefetch: Number of decoded chunks buffered ahead of the consumer. Default is 4.
+
+    Yields:
+    - np.ndarray: uint8 RGB frames of shape (n, H, W, 3), n <= chunk_size.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Cannot open video '{path}'")
+    chunks = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        # Give up when the consumer stopped early instead of blocking forever
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def decode():
+        try:
+            chunk, n = None, 0
+            while not stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if chunk is None:
+                    chunk = np.empty((chunk_size,) + frame.shape, dtype=np.uint8)
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=chunk[n])
+                n += 1
+                if n == chunk_size:
+                    if not put(chunk):
+                        return
+                    chunk, n = None, 0
+            if n:
+                put(chunk[:n])
+            put(None)
+        except Exception as error:
+            put(error)
+        finally:
+            capture.release()
+
+    worker = threading.Thread(target=decode, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+def analyze_video(path, out_path, chunk_size=256, prefetch=4, dark_range=(5, 15)):
+    """Compute per-frame statistics of a video and write them incrementally.
+
+    Every chunk is converted to grayscale and reduced to one row per frame,
+    which is written straight into a memory-mapped .npy file.
+
+    Args:
+    - path: Path to the video file.
+    - out_path: Path of the .npy file with one STATS_DTYPE row per frame.
+    - chunk_size: Number of frames per chunk. Default is 256.
+    - prefetch: Number of decoded chunks buffered ahead. Default is 4.
+    - dark_range: (low, high) gray values counted as glottis. Pixels below low are the black border
+      around the endoscope image. Default is (5, 15).
+
+    Returns:
+    - (stats, fps): Memory-mapped stats of the processed frames and the frames per second achieved.
+    """
+    # CAP_PROP_FRAME_COUNT is only an estimate; frames beyond it are kept in extra
+    n_frames = frame_count(path)
+    stats = np.lib.format.open_memmap(out_path, mode="w+", dtype=STATS_DTYPE, shape=(n_frames,))
+    extra = []
+    low, high = dark_range
+    gray = None
+    done = 0
+
+    start = time.perf_counter()
+    for chunk in read_frames(path, chunk_size, prefetch):
+        n = len(chunk)
+        if gray is None:
+            gray = np.empty((chunk_size,) + chunk.shape[1:3], dtype=np.uint8)
+        frames = to_grayscale(chunk, method="luminosity", out=gray[:n])
+        rows = np.empty(n, dtype=STATS_DTYPE)
+        rows["frame"] = np.arange(done, done + n)
+        rows["mean_intensity"] = frames.mean(axis=(1, 2), dtype=np.float64)
+        rows["glottal_area"] = np.count_nonzero((frames >= low) & (frames < high), axis=(1, 2))
+        fit = max(0, min(n, n_frames - done))
+        stats[done:done + fit] = rows[:fit]
+        if fit < n:
+            extra.append(rows[fit:])
+        done += n
+    seconds = time.perf_counter() - start
+    stats.flush()
+
+    if done != n_frames:
+        # Rewrite the file with exactly the frames read, so no all-zero rows skew the statistics
+        exact = np.concatenate([stats[:min(done, n_frames)]] + extra)
+        del stats
+        np.save(out_path + ".tmp.npy", exact)
+        os.replace(out_path + ".tmp.npy", out_path)
+        stats = np.load(out_path, mmap_mode="r+")
+    return stats, done / seconds if seconds else 0.0
+
+
+if __name__ == "__main__":
+    stats, fps = analyze_video(VIDEO_PATH, "glottis_video_stats.npy")
+    print(f"Processed {len(stats)} frames at {fps:.1f} frames/s")
+    print(f"Mean intensity: {stats['mean_intensity'].mean():.2f}")
+    print(f"Glottal area proxy (px): min {stats['glottal_area'].min()}, max {stats['glottal_area'].max()}")
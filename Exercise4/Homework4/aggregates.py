@@ -0,0 +1,263 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from census import SCHEMA, apply_schema, infer_schema
+
+# Rows per chunk of a scan
+CHUNK_SIZE = 100_000
+
+# Above this number of possible key combinations map falls back to groupby
+MAX_BINS = 1 << 22
+
+
+def _plain(frame):
+    # Categorical key columns of different chunks have different categories; partials use plain values
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype(object)
+    return frame
+
+
+def _groups(chunk, keys, valid):
+    """Flat group code per valid row, the code space shape and the key values of every level.
+
+    Categorical columns use their codes directly, other columns are factorized.
+    Returns None if the code space is larger than MAX_BINS.
+    """
+    codes, levels = [], []
+    for key in keys:
+        column = chunk[key]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            code, level = column.cat.codes.to_numpy(), np.asarray(column.cat.categories, dtype=object)
+        else:
+            code, level = pd.factorize(column)
+        codes.append(code)
+        levels.append(np.asarray(level))
+        valid &= code >= 0
+    shape = tuple(max(len(level), 1) for level in levels)
+    if np.prod(shape, dtype=np.float64) > MAX_BINS:
+        return None
+    return np.ravel_multi_index([code[valid] for code in codes], shape), shape, levels
+
+
+def _key_frame(bins, shape, levels, keys):
+    # Key values of the given flat group codes
+    indices = np.unravel_index(bins, shape)
+    return pd.DataFrame({key: level[index] for key, level, index in zip(keys, levels, indices)})
+
+
+class Aggregate:
+    """One aggregate of a scan.
+
+    map turns a chunk into a small partial frame (one bincount over the group
+    codes of the chunk), combine merges partial frames of chunks or
+    partitions, finalize turns the merged partial into the frame handed to the
+    plot. Partials are associative, so chunks and partitions can be processed
+    in any grouping.
+
+    Args:
+    - keys: Column or list of columns to group by. Rows with a missing key are skipped.
+    - notnull: Further columns that must not be missing, like the null filters of homework4.py.
+    """
+
+    def __init__(self, keys, notnull=()):
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        self.notnull = [notnull] if isinstance(notnull, str) else list(notnull)
+
+    @property
+    def columns(self):
+        return self.keys + self.notnull
+
+    def _rows(self, chunk):
+        return chunk.dropna(subset=self.notnull) if self.notnull else chunk
+
+    def _valid(self, chunk):
+        # Rows that pass the notnull filter
+        valid = np.ones(len(chunk), dtype=bool)
+        for column in self.notnull:
+            valid &= chunk[column].notna().to_numpy()
+        return valid
+
+    def combine(self, partials):
+        partials = [partial for partial in partials if partial is not None]
+        if not partials:
+            return None
+        # sort=False keeps the order of first appearance across chunks
+        return pd.concat(partials, ignore_index=True).groupby(self.keys, sort=False).sum().reset_index()
+
+
+class Count(Aggregate):
+    """Number of rows per key, column "count".
+
+    Args:
+    - keys, notnull: See Aggregate.
+    - sort: Sort the result by the keys instead of keeping the order of first appearance.
+    """
+
+    def __init__(self, keys, notnull=(), sort=False):
+        super().__init__(keys, notnull)
+        self.sort = sort
+
+    def map(self, chunk):
+        groups = _groups(chunk, self.keys, self._valid(chunk))
+        if groups is None:
+            counts = self._rows(chunk).groupby(self.keys, observed=True, sort=False).size()
+            return _plain(counts.reset_index(name="count"))
+        codes, shape, levels = groups
+        counts = np.bincount(codes, minlength=int(np.prod(shape)))
+        bins = np.flatnonzero(counts)
+        frame = _key_frame(bins, shape, levels, self.keys)
+        frame["count"] = counts[bins]
+        return frame
+
+    def finalize(self, partial):
+        if partial is None:
+            return pd.DataFrame(columns=self.keys + ["count"])
+        return partial.sort_values(self.keys, ignore_index=True) if self.sort else partial
+
+
+class Mean(Aggregate):
+    """Mean of a value column per key, column named like the value column.
+
+    Args:
+    - value: Column to average. Rows with a missing value are skipped.
+    - by: Column or list of columns to group by.
+    - notnull: See Aggregate.
+    """
+
+    def __init__(self, value, by, notnull=()):
+        super().__init__(by, notnull)
+        self.value = value
+
+    @property
+    def columns(self):
+        return super().columns + [self.value]
+
+    def map(self, chunk):
+        values = chunk[self.value]
+        valid = self._valid(chunk) & values.notna().to_numpy()
+        groups = _groups(chunk, self.keys, valid)
+        if groups is None:
+            grouped = self._rows(chunk).groupby(self.keys, observed=True, sort=False)[self.value]
+            return _plain(grouped.agg(["sum", "count"]).reset_index())
+        codes, shape, levels = groups
+        size = int(np.prod(shape))
+        counts = np.bincount(codes, minlength=size)
+        sums = np.bincount(codes, weights=values.to_numpy(dtype=np.float64, na_value=0)[valid], minlength=size)
+        bins = np.flatnonzero(counts)
+        frame = _key_frame(bins, shape, levels, self.keys)
+        frame["sum"] = sums[bins]
+        frame["count"] = counts[bins]
+        return frame
+
+    def finalize(self, partial):
+        if partial is None:
+            return pd.DataFrame(columns=self.keys + [self.value])
+        frame = partial[self.keys].copy()
+        frame[self.value] = partial["sum"] / partial["count"]
+        return frame
+
+
+def iter_chunks(source, columns=None, chunksize=CHUNK_SIZE):
+    """Yield DataFrame chunks of a Parquet file, a census CSV or a DataFrame.
+
+    Parquet files are read batch by batch with only the requested columns.
+    CSV chunks get the typed schema of census.py, so whitespace is stripped
+    and the chunks look like the cached table.
+    """
+    if isinstance(source, pd.DataFrame):
+        source = source if columns is None else source[columns]
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+    elif str(source).endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        kwargs = {"index_col": 0} if columns is None else {"usecols": columns}
+        for chunk in pd.read_csv(source, chunksize=chunksize, **kwargs):
+            yield apply_schema(chunk, infer_schema(chunk, SCHEMA))
+
+
+def scan_partition(source, aggregates, chunksize=CHUNK_SIZE):
+    """Merged partials of all aggregates over one source, reading each chunk once."""
+    columns = list(dict.fromkeys(column for aggregate in aggregates.values() for column in aggregate.columns))
+    partials = dict.fromkeys(aggregates)
+    for chunk in iter_chunks(source, columns, chunksize):
+        for name, aggregate in aggregates.items():
+            partials[name] = aggregate.combine([partials[name], aggregate.map(chunk)])
+    return partials
+
+
+def scan(sources, aggregates, chunksize=CHUNK_SIZE, workers=None):
+    """Compute all declared aggregates in one pass over the data.
+
+    Every chunk is read once (only the union of the needed columns) and
+    mapped by every aggregate. Several sources (file partitions) are scanned
+    in parallel processes and their partials reduced afterwards.
+
+    Args:
+    - sources: Parquet path, CSV path, DataFrame or list of them (partitions).
+    - aggregates: Dict {name: Aggregate}.
+    - chunksize: Rows per chunk. Default is 100000.
+    - workers: Number of processes for several partitions. Default is the CPU count.
+
+    Returns:
+    - dict: {name: pd.DataFrame} ready to be passed to seaborn.
+    """
+    if not isinstance(sources, (list, tuple)):
+        sources = [sources]
+    workers = min(workers or os.cpu_count(), len(sources))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(scan_partition, sources, [aggregates] * len(sources),
+                                        [chunksize] * len(sources)))
+    else:
+        results = [scan_partition(source, aggregates, chunksize) for source in sources]
+    return {
+        name: aggregate.finalize(aggregate.combine([result[name] for result in results]))
+        for name, aggregate in aggregates.items()
+    }
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from census import census_parquet, load_census
+
+    # Eight partitions of 2 million rows each
+    census = load_census()
+    folder = tempfile.mkdtemp()
+    partitions = []
+    for i in range(8):
+        path = os.path.join(folder, f"part{i}.parquet")
+        census.sample(2_000_000, replace=True, random_state=i).to_parquet(path, row_group_size=CHUNK_SIZE)
+        partitions.append(path)
+
+    aggregates = {
+        "age": Count("AGE", sort=True),
+        "relationship": Count("RELATIONSHIP"),
+        "salary": Count(["EDUCATION", "SALARY"]),
+        "education_num": Mean("EDUCATION-NUM", by="EDUCATION", notnull="SALARY"),
+    }
+    for workers in (1, os.cpu_count()):
+        start = time.time()
+        results = scan(partitions, aggregates, workers=workers)
+        end = time.time()
+        print(f"{workers} workers: 16 million rows, {len(aggregates)} aggregates in {end - start:.3f} seconds")
+
+    start = time.time()
+    for path in partitions:
+        frame = pd.read_parquet(path)
+        frame["AGE"].value_counts()
+        frame["RELATIONSHIP"].value_counts()
+        frame.groupby(["EDUCATION", "SALARY"], observed=True).size()
+        frame.groupby("EDUCATION", observed=True)["EDUCATION-NUM"].mean()
+    end = time.time()
+    print(f"Separate full-table aggregates: {end - start:.3f} seconds")
+    print(results["salary"].head())
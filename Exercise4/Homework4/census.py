@@ -0,0 +1,127 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+CENSUS_PATH = "census_income_dataset.csv"
+CACHE_DIR = "__cache__"
+
+# Pinned column types; all other columns are inferred at ingest (smallest integer type or category)
+SCHEMA = {
+    "AGE": "uint8",
+    "EDUCATION-NUM": "uint8",
+    "EDUCATION": "category",
+    "RELATIONSHIP": "category",
+    "SALARY": "category",
+}
+
+
+def file_hash(path, block_size=1 << 20):
+    """sha1 of the file content."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def infer_schema(frame, pinned=SCHEMA):
+    """Column types of a freshly parsed frame: pinned types win, integers are downcast, strings become categories."""
+    schema = {}
+    for column in frame.columns:
+        if column in pinned:
+            schema[column] = pinned[column]
+        elif pd.api.types.is_integer_dtype(frame[column]):
+            schema[column] = pd.to_numeric(frame[column], downcast="unsigned" if frame[column].min() >= 0 else "integer").dtype.name
+        elif pd.api.types.is_numeric_dtype(frame[column]):
+            schema[column] = "float32"
+        else:
+            schema[column] = "category"
+    return schema
+
+
+def apply_schema(frame, schema):
+    """Convert the columns of a frame in place.
+
+    Text columns are factorized and surrounding whitespace is stripped from the
+    unique values only (values that become equal are merged). Categories keep
+    the order of their first appearance.
+    """
+    for column, dtype in schema.items():
+        if dtype == "category":
+            codes, uniques = pd.factorize(frame[column])
+            if pd.api.types.is_string_dtype(uniques):
+                remap, uniques = pd.factorize(pd.Index(uniques).str.strip())
+                codes = np.where(codes >= 0, remap[codes], -1)
+            frame[column] = pd.Categorical.from_codes(codes, categories=np.asarray(uniques, dtype=object))
+        elif dtype.startswith(("int", "uint")) and frame[column].isna().any():
+            # Missing values need pandas' nullable integer type (e.g. UInt8)
+            frame[column] = frame[column].astype("UInt" + dtype[4:] if dtype.startswith("u") else "Int" + dtype[3:])
+        else:
+            frame[column] = frame[column].astype(dtype)
+    return frame
+
+
+def read_census_csv(path=CENSUS_PATH, pinned=SCHEMA):
+    """Parse the census CSV: the unnamed index column becomes the index and the schema is inferred and applied."""
+    frame = pd.read_csv(path, index_col=0)
+    frame.index.name = None
+    return apply_schema(frame, infer_schema(frame, pinned))
+
+
+def cache_path(path=CENSUS_PATH, cache_dir=None):
+    """Parquet cache of a census CSV, keyed by the hash of its content."""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(path), CACHE_DIR)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}_{file_hash(path)[:16]}.parquet")
+
+
+def census_parquet(path=CENSUS_PATH, cache_dir=None):
+    """Path of the Parquet cache of a census CSV; the CSV is parsed only if no cache for its current content exists."""
+    cached = cache_path(path, cache_dir)
+    if not os.path.exists(cached):
+        frame = read_census_csv(path)
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        # Write to a temporary file first, so an interrupted run never leaves a broken cache
+        frame.to_parquet(cached + ".tmp", engine="pyarrow")
+        os.replace(cached + ".tmp", cached)
+    return cached
+
+
+def load_census(path=CENSUS_PATH, columns=None, cache_dir=None):
+    """Typed census table, read from a Parquet cache after the first call.
+
+    The CSV is parsed only when no cache for its current content exists. The
+    cache is columnar, so passing columns reads nothing but those columns.
+
+    Args:
+    - path: Path to census_income_dataset.csv. Default is "census_income_dataset.csv".
+    - columns: Columns to load. Default is all columns.
+    - cache_dir: Folder for the cache. Default is __cache__ next to the CSV.
+
+    Returns:
+    - pd.DataFrame: Small integer types for numbers, categoricals for text columns.
+    """
+    cached = census_parquet(path, cache_dir)
+    return pd.read_parquet(cached, columns=None if columns is None else list(columns), engine="pyarrow")
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.time()
+    raw = pd.read_csv(CENSUS_PATH)
+    end = time.time()
+    print(f"pd.read_csv: {(end - start) * 1000:.1f} ms, {raw.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+
+    load_census()
+    start = time.time()
+    census = load_census()
+    end = time.time()
+    print(f"load_census (cached): {(end - start) * 1000:.1f} ms, {census.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+
+    start = time.time()
+    age = load_census(columns=["AGE"])
+    end = time.time()
+    print(f"load_census(columns=['AGE']): {(end - start) * 1000:.1f} ms, {age.memory_usage(deep=True).sum() / 1e6:.2f} MB")
@@ -0,0 +1,207 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Layers with more points than this are aggregated (scatter, line) or rasterized (any other artist)
+DENSE_POINTS = 10_000
+
+
+class FigureSpec:
+    """One figure of a batch: a draw function, its arguments and the output file.
+
+    The draw function plots into the current matplotlib figure (plain pyplot
+    or seaborn calls) and must be defined at module level, so that worker
+    processes can unpickle it.
+
+    Args:
+    - path: Output file; the format follows the extension (.svg, .png, .pdf).
+    - draw: Function drawing the figure.
+    - args, kwargs: Arguments of draw.
+    - figsize: Figure size in inches. Default is matplotlib's default.
+    - savefig: Extra arguments of savefig, e.g. {"bbox_inches": "tight", "dpi": 150}.
+    """
+
+    def __init__(self, path, draw, args=(), kwargs=None, figsize=None, savefig=None):
+        self.path = path
+        self.draw = draw
+        self.args = tuple(args)
+        self.kwargs = kwargs or {}
+        self.figsize = figsize
+        self.savefig = savefig or {}
+
+    def render(self, dense_points=DENSE_POINTS, show=False):
+        """Draw, rasterize dense layers, save and close; returns (path, seconds, bytes)."""
+        import matplotlib.pyplot as plt
+
+        start = time.perf_counter()
+        fig = plt.figure(figsize=self.figsize)
+        self.draw(*self.args, **self.kwargs)
+        rasterize_dense(fig, dense_points)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        plt.savefig(self.path, **self.savefig)
+        if show:
+            plt.show()
+        plt.close(fig)
+        return self.path, time.perf_counter() - start, os.path.getsize(self.path)
+
+
+def rasterize_dense(fig, dense_points=DENSE_POINTS):
+    """Rasterize every layer with more than dense_points points, the axes and text stay vectors.
+
+    A rasterized layer is stored as one image inside the SVG/PDF, so the file
+    size no longer grows with the number of points.
+    """
+    from matplotlib.collections import Collection
+    from matplotlib.lines import Line2D
+
+    for ax in fig.axes:
+        for artist in ax.get_children():
+            if isinstance(artist, Line2D):
+                n = len(artist.get_xdata())
+            elif isinstance(artist, Collection):
+                n = max(len(artist.get_offsets()), len(artist.get_paths()))
+            else:
+                continue
+            if n > dense_points:
+                artist.set_rasterized(True)
+
+
+def scatter(x, y, ax=None, dense_points=DENSE_POINTS, bins=200, cmap="Blues", **kwargs):
+    """Scatter plot that turns into a 2D histogram above dense_points points.
+
+    Args:
+    - x, y: Coordinates.
+    - ax: Axes to draw into. Default is the current axes.
+    - dense_points: Largest number of points drawn individually. Default is 10000.
+    - bins: Number of histogram bins per axis for dense data. Default is 200.
+    - cmap: Colormap of the histogram. Default is "Blues".
+    - kwargs: Passed to ax.scatter for sparse data.
+    """
+    import matplotlib.pyplot as plt
+
+    ax = ax or plt.gca()
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if len(x) <= dense_points:
+        return ax.scatter(x, y, **kwargs)
+    valid = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=bins)
+    # Empty bins stay transparent
+    counts = np.ma.masked_equal(counts.T, 0)
+    return ax.pcolormesh(x_edges, y_edges, counts, cmap=cmap, rasterized=True)
+
+
+def decimate(x, y, n_buckets=DENSE_POINTS // 2):
+    """Reduce a line to the first, minimum, maximum and last point of n_buckets x-buckets.
+
+    The rendered line keeps every peak, because within one bucket (a fraction of
+    a pixel at the usual figure sizes) only the extremes are visible.
+
+    Returns:
+    - (x, y): Decimated coordinates sorted by x.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if len(x) <= 4 * n_buckets:
+        return x, y
+    order = np.argsort(x, kind="stable")
+    x, y = x[order], y[order]
+    bucket = np.minimum(((x - x[0]) / max(x[-1] - x[0], np.finfo(float).tiny) * n_buckets).astype(np.int64),
+                        n_buckets - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(x)] - 1
+    # argmin/argmax per bucket via reduceat on the y values
+    minima = np.minimum.reduceat(y, starts)
+    maxima = np.maximum.reduceat(y, starts)
+    is_min = y == np.repeat(minima, np.diff(np.r_[starts, len(x)]))
+    is_max = y == np.repeat(maxima, np.diff(np.r_[starts, len(x)]))
+    keep = is_min | is_max
+    keep[starts] = True
+    keep[ends] = True
+    return x[keep], y[keep]
+
+
+def line(x, y, ax=None, dense_points=DENSE_POINTS, **kwargs):
+    """ax.plot of a line that is decimated to about dense_points points first."""
+    import matplotlib.pyplot as plt
+
+    ax = ax or plt.gca()
+    x, y = decimate(x, y, max(dense_points // 4, 1))
+    return ax.plot(x, y, **kwargs)
+
+
+def _init_worker():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render(spec, dense_points):
+    return spec.render(dense_points)
+
+
+def render_all(specs, workers=None, dense_points=DENSE_POINTS):
+    """Render a batch of figures headless in a process pool.
+
+    Each worker uses the Agg backend and renders whole figures, so the batch
+    scales with the number of cores and never opens a window.
+
+    Args:
+    - specs: List of FigureSpec.
+    - workers: Number of processes. Default is the CPU count.
+    - dense_points: See rasterize_dense. Default is 10000.
+
+    Returns:
+    - list: (path, seconds, bytes) per figure, in the order of specs.
+    """
+    workers = min(workers or os.cpu_count(), len(specs))
+    if workers <= 1:
+        import matplotlib
+
+        # Headless like the workers, but leave the caller's backend as it was
+        backend = matplotlib.get_backend()
+        matplotlib.use("Agg")
+        try:
+            return [spec.render(dense_points) for spec in specs]
+        finally:
+            matplotlib.use(backend)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        return list(executor.map(_render, specs, [dense_points] * len(specs)))
+
+
+def _demo_scatter(x, y, aggregate):
+    import matplotlib.pyplot as plt
+
+    if aggregate:
+        scatter(x, y)
+    else:
+        plt.scatter(x, y, s=2)
+    plt.xlabel("x")
+    plt.ylabel("y")
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=500_000)
+    y = x + rng.normal(size=len(x))
+    folder = tempfile.mkdtemp()
+
+    for aggregate, dense_points in ((False, 10 ** 9), (False, DENSE_POINTS), (True, DENSE_POINTS)):
+        path, seconds, size = render_all(
+            [FigureSpec(os.path.join(folder, "scatter.svg"), _demo_scatter, (x, y, aggregate))],
+            workers=1, dense_points=dense_points,
+        )[0]
+        mode = "binned" if aggregate else "rasterized" if dense_points == DENSE_POINTS else "vector"
+        print(f"{len(x)} points, {mode}: {seconds:.2f} seconds, {size / 1e6:.2f} MB")
+
+    specs = [
+        FigureSpec(os.path.join(folder, f"scatter{i}.svg"), _demo_scatter, (x[::10] + i, y[::10], True))
+        for i in range(24)
+    ]
+    for workers in (1, os.cpu_count()):
+        start = time.time()
+        render_all(specs, workers=workers)
+        end = time.time()
+        print(f"{len(specs)} figures with {workers} workers: {end - start:.2f} seconds")
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Languages extracted in exercise_4_solution.ipynb
+LANGUAGE_PATTERN = r"(javascript|java|python|php|c\+\+|c#|swift|scala|go|kotlin)"
+
+
+class TextNormalizer:
+    """Normalize a free-text column through its unique values.
+
+    The column is factorized first; lowercasing, the alias mapping and the
+    regex run once per distinct answer and the labels are broadcast back to
+    the rows through the integer codes. A survey with millions of rows but a
+    few thousand distinct answers therefore costs O(uniques) Python work plus
+    one vectorized take. Labels are also kept in a dictionary that can be
+    persisted as JSON, so later runs only process answers never seen before.
+
+    Args:
+    - pattern: Regex with one capture group; the label is the first match (like Series.str.extract).
+      Values without a match become NaN. Default is None (no extraction).
+    - aliases: Dict mapping lowercased answers to a replacement before the regex, e.g. {"js": "javascript"}.
+    - lowercase: Lowercase the answers first. Default is True.
+    - cache_path: JSON file of the label cache. Default is None (in-memory only).
+    """
+
+    def __init__(self, pattern=None, aliases=None, lowercase=True, cache_path=None):
+        self.pattern = pattern
+        self.aliases = dict(aliases or {})
+        self.lowercase = lowercase
+        self.cache_path = cache_path
+        self._regex = re.compile(pattern) if pattern is not None else None
+        self.cache = self._load()
+
+    @property
+    def signature(self):
+        """Hash of the settings; a cache written with other settings is ignored."""
+        settings = json.dumps([self.pattern, sorted(self.aliases.items()), self.lowercase])
+        return hashlib.sha1(settings.encode()).hexdigest()
+
+    def _load(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return {}
+        with open(self.cache_path, encoding="utf-8") as f:
+            stored = json.load(f)
+        return stored["labels"] if stored.get("signature") == self.signature else {}
+
+    def save(self):
+        """Write the label cache to cache_path."""
+        if self.cache_path is None:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        with open(self.cache_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"signature": self.signature, "labels": self.cache}, f, ensure_ascii=False)
+        os.replace(self.cache_path + ".tmp", self.cache_path)
+
+    def normalize(self, value):
+        """Label of a single answer (None if the pattern does not match)."""
+        if self.lowercase:
+            value = value.lower()
+        value = self.aliases.get(value, value)
+        if self._regex is None:
+            return value
+        match = self._regex.search(value)
+        return match.group(1) if match else None
+
+    def __call__(self, series, save=True):
+        """Normalized copy of a Series (same index, missing values stay missing).
+
+        Args:
+        - series: Column of strings.
+        - save: Write new labels to cache_path. Default is True.
+        """
+        codes, uniques = pd.factorize(series)
+        new = [value for value in uniques if value not in self.cache]
+        for value in new:
+            self.cache[value] = self.normalize(value)
+        if new and save:
+            self.save()
+
+        # One label per unique answer plus a trailing missing value for code -1
+        labels = np.array([self.cache[value] for value in uniques] + [None], dtype=object)
+        labels[pd.isnull(labels)] = np.nan
+        return pd.Series(labels[codes], index=series.index, name=series.name)
+
+
+if __name__ == "__main__":
+    import time
+
+    survey = pd.read_csv("IT Salary Survey EU  2020.csv")
+    column = survey["Your main technology / programming language"]
+    # The same answers repeated to a few million rows
+    large = pd.concat([column] * 2000, ignore_index=True)
+
+    start = time.time()
+    expected = large.str.lower().str.extract(LANGUAGE_PATTERN)[0]
+    end = time.time()
+    print(f"str.lower + str.extract on {len(large)} rows: {end - start:.3f} seconds")
+
+    normalizer = TextNormalizer(LANGUAGE_PATTERN)
+    start = time.time()
+    labels = normalizer(large)
+    end = time.time()
+    print(f"TextNormalizer on {len(large)} rows ({len(normalizer.cache)} uniques): {end - start:.3f} seconds")
+    print("Same labels:", bool((labels.fillna("") == expected.fillna("")).all()))
@@ -0,0 +1,206 @@
+import os
+import random
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import albumentations as A
+import imageio.v2 as io
+import numpy as np
+
+# Per-process state of the augmentation workers, set by _init_worker
+_worker = {}
+
+
+def sample_seed(seed, epoch, sample_id):
+    """Seed of one sample in one epoch, independent of worker count and scheduling."""
+    return int(np.random.SeedSequence([seed, epoch, int(sample_id)]).generate_state(1)[0])
+
+
+def seed_transform(transform, seed):
+    """Make the next call of an albumentations transform deterministic."""
+    if hasattr(transform, "set_random_seed"):
+        transform.set_random_seed(seed)
+    # Older albumentations versions draw from the global generators
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def _init_worker(dataset, transform, buffers):
+    _worker["dataset"] = dataset
+    _worker["transform"] = transform
+    _worker["buffers"] = []
+    for image_spec, mask_spec in buffers:
+        arrays = []
+        for name, shape in (image_spec, mask_spec):
+            shm = shared_memory.SharedMemory(name=name)
+            arrays.append((shm, np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)))
+        _worker["buffers"].append(arrays)
+
+
+def _augment(buffer, slot, sample_id, seed):
+    start = time.perf_counter()
+    image, mask = _worker["dataset"].pair(sample_id)
+    if mask is None:
+        # Samples without a segmentation are augmented with an empty mask
+        mask = np.zeros(np.shape(image)[:2], dtype=np.uint8)
+    transform = _worker["transform"]
+    seed_transform(transform, seed)
+    augmented = transform(image=np.asarray(image), mask=np.asarray(mask))
+    (_, images), (_, masks) = _worker["buffers"][buffer]
+    images[slot] = augmented["image"]
+    masks[slot] = augmented["mask"]
+    return time.perf_counter() - start
+
+
+def _release(executor, shms):
+    executor.shutdown()
+    for shm in shms:
+        shm.close()
+        shm.unlink()
+
+
+class ImagePairs:
+    """Minimal dataset of <id>.png images with optional <id>_seg.png masks in one folder.
+
+    Args:
+    - path: Folder of the images, e.g. a Mini_BAGLS_dataset copy.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        names = os.listdir(path)
+        self.ids = np.array(sorted(int(name[:-4]) for name in names if name.endswith(".png") and name[:-4].isdigit()))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def pair(self, sample_id):
+        """(image, mask) of a sample; mask is None if it has no _seg.png."""
+        mask_path = os.path.join(self.path, f"{sample_id}_seg.png")
+        image = io.imread(os.path.join(self.path, f"{sample_id}.png"))
+        return image, io.imread(mask_path) if os.path.exists(mask_path) else None
+
+
+class AugmentationEngine:
+    """Apply an albumentations transform to a whole dataset in a process pool.
+
+    Every sample is augmented with a seed derived from (seed, epoch, sample id),
+    so an epoch produces identical batches at any worker count. Workers write
+    straight into shared-memory batch buffers; while one batch is consumed the
+    next one is already being filled. Samples without a mask get an all-zero
+    mask. Use the engine as a context manager or call close(); otherwise the
+    pool and the shared memory are released when the engine is garbage
+    collected.
+
+    Args:
+    - dataset: Object with .ids and .pair(sample_id) -> (image, mask), e.g. a BaglsDataset. If it has
+      a build_cache method, the cache is built once here, before the workers start.
+    - transform: albumentations transform applied to image and mask.
+    - out_shape: (H, W) of the output. A resize to this shape is appended to the transform.
+    - batch_size: Number of samples per batch. Default is 32.
+    - workers: Number of worker processes. Default is the CPU count.
+    - seed: Base seed of all epochs. Default is 0.
+    - channels: Number of image channels. Default is 3.
+    """
+
+    def __init__(self, dataset, transform, out_shape, batch_size=32, workers=None, seed=0, channels=3):
+        self.dataset = dataset
+        self.transform = A.Compose([transform, A.Resize(*out_shape)])
+        self.out_shape = tuple(out_shape)
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count()
+        self.seed = seed
+        self.timings = []
+
+        # Decode once in this process, so the workers only open the finished cache
+        if hasattr(dataset, "build_cache"):
+            dataset.build_cache()
+
+        # Two batch buffers: workers fill one while the caller reads the other
+        self._shm = []
+        self._buffers = []
+        specs = []
+        for _ in range(2):
+            buffer, spec = [], []
+            for shape in ((batch_size,) + self.out_shape + (channels,), (batch_size,) + self.out_shape):
+                shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+                self._shm.append(shm)
+                buffer.append(np.ndarray(shape, dtype=np.uint8, buffer=shm.buf))
+                spec.append((shm.name, shape))
+            self._buffers.append(buffer)
+            specs.append(tuple(spec))
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(dataset, self.transform, specs),
+        )
+        self._finalizer = weakref.finalize(self, _release, self._executor, self._shm)
+
+    def epoch(self, epoch, ids=None, shuffle=True, copy=False):
+        """Augment all samples once.
+
+        Args:
+        - epoch: Epoch number, part of every sample seed.
+        - ids: Sample ids to augment. Default is all ids of the dataset.
+        - shuffle: Shuffle the sample order with a seed derived from (seed, epoch).
+        - copy: Yield copies instead of views into the shared buffers.
+
+        Yields:
+        - (ids, images, masks): uint8 arrays of shape (n, H, W, C) and (n, H, W). Without copy=True
+          they are only valid until the next batch is requested.
+        """
+        ids = np.asarray(self.dataset.ids if ids is None else ids)
+        if shuffle:
+            ids = np.random.default_rng([self.seed, epoch]).permutation(ids)
+        batches = [ids[i:i + self.batch_size] for i in range(0, len(ids), self.batch_size)]
+        self.timings = []
+
+        def submit(n):
+            return [
+                self._executor.submit(_augment, n % 2, slot, sample_id, sample_seed(self.seed, epoch, sample_id))
+                for slot, sample_id in enumerate(batches[n])
+            ]
+
+        pending = submit(0) if batches else []
+        for n, batch_ids in enumerate(batches):
+            wait(pending)
+            self.timings.extend(future.result() for future in pending)
+            # Start filling the other buffer before handing this one out
+            pending = submit(n + 1) if n + 1 < len(batches) else []
+            images, masks = self._buffers[n % 2]
+            images, masks = images[:len(batch_ids)], masks[:len(batch_ids)]
+            if copy:
+                images, masks = images.copy(), masks.copy()
+            yield batch_ids, images, masks
+        wait(pending)
+
+    def close(self):
+        # The views into the buffers have to go before the shared memory can be closed
+        self._buffers = []
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    dataset = ImagePairs("Mini_BAGLS_dataset")
+    transform = A.Compose([
+        A.HorizontalFlip(p=0.5),
+        A.VerticalFlip(p=0.5),
+        A.ElasticTransform(alpha=120, sigma=120 * 0.05, p=1),
+    ])
+
+    for workers in (1, os.cpu_count()):
+        with AugmentationEngine(dataset, transform, out_shape=(512, 256), batch_size=16, workers=workers) as engine:
+            start = time.time()
+            checksum = 0
+            for batch_ids, images, masks in engine.epoch(0):
+                checksum += int(images.sum(dtype=np.int64)) + int(masks.sum(dtype=np.int64))
+            end = time.time()
+        print(f"{workers} workers: {len(dataset) / (end - start):.1f} samples/s, checksum {checksum}")
@@ -0,0 +1,165 @@
+import random
+from functools import lru_cache
+
+import albumentations as A
+import cv2
+import numpy as np
+
+# Number of displacement fields kept in memory (the fixed-point maps of a 512x256 frame take 768 kB)
+ELASTIC_CACHE_SIZE = 256
+
+
+def _expected_max_abs(n):
+    """Expected maximum of |x| over n standard normal samples (extreme value approximation)."""
+    a = np.sqrt(2 * np.log(2 * n))
+    return a - (np.log(np.log(2 * n)) + np.log(4 * np.pi)) / (2 * a) + np.euler_gamma / a
+
+
+@lru_cache(maxsize=ELASTIC_CACHE_SIZE)
+def elastic_maps(shape, alpha, sigma, seed, scale=4):
+    """Build (and cache) the remap tables of one elastic deformation.
+
+    The random displacement is drawn and Gaussian-smoothed on a grid `scale`
+    times coarser than the image and upsampled bilinearly afterwards. The
+    smoothing then runs on 1/scale**2 of the pixels, and since the field is
+    smooth at scale sigma the upsampling loses practically nothing for
+    sigma >= scale.
+
+    The noise matches A.ElasticTransform: Gaussian, divided by the largest
+    absolute value expected in a full resolution field. Smoothing scale**2
+    times fewer samples with a scale times smaller sigma leaves a field that
+    is scale times stronger, so it is divided by scale, and the displacement
+    has the same size as A.ElasticTransform's at any scale.
+
+    Args:
+    - shape: (H, W) of the image.
+    - alpha: Displacement strength in pixels, as in A.ElasticTransform.
+    - sigma: Smoothing of the displacement in pixels, as in A.ElasticTransform.
+    - seed: Seed of the random field.
+    - scale: Downsampling factor of the field. Default is 4.
+
+    Returns:
+    - (map1, map2): Fixed-point maps for cv2.remap (from cv2.convertMaps), read-only.
+    """
+    height, width = shape
+    small = (max(1, -(-height // scale)), max(1, -(-width // scale)))
+    rng = np.random.default_rng(seed)
+    strength = np.float32(alpha / (scale * _expected_max_abs(2 * height * width)))
+    fields = []
+    for _ in range(2):
+        noise = rng.standard_normal(size=small, dtype=np.float32)
+        noise = cv2.GaussianBlur(noise, (0, 0), sigmaX=max(sigma / scale, 0.1), borderType=cv2.BORDER_REPLICATE)
+        fields.append(cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR) * strength)
+    dx, dy = fields
+    grid_x, grid_y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+    map1, map2 = cv2.convertMaps(grid_x + dx, grid_y + dy, cv2.CV_16SC2)
+    map1.flags.writeable = False
+    map2.flags.writeable = False
+    return map1, map2
+
+
+def elastic_deform(image, mask=None, alpha=120, sigma=6, seed=0, scale=4):
+    """Deform an image and its binary mask with one cached displacement field.
+
+    The mask is stacked onto the image as an extra channel, so both are warped
+    by a single cv2.remap call. The interpolated mask channel is thresholded at
+    half of the mask's foreground value, which keeps it binary.
+
+    Args:
+    - image: uint8 array of shape (H, W) or (H, W, C) with C <= 3.
+    - mask: Optional binary mask of shape (H, W).
+    - alpha, sigma, seed, scale: See elastic_maps.
+
+    Returns:
+    - (image, mask): Deformed arrays, mask is None if none was given.
+    """
+    map1, map2 = elastic_maps(tuple(image.shape[:2]), alpha, sigma, seed, scale)
+    if mask is None:
+        return cv2.remap(image, map1, map2, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT), None
+    foreground = mask.max()
+    stacked = np.dstack([image, mask])
+    warped = cv2.remap(stacked, map1, map2, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+    threshold = (int(foreground) + 1) // 2
+    warped_mask = np.where(warped[..., -1] >= max(threshold, 1), foreground, 0).astype(mask.dtype)
+    warped_image = warped[..., :-1] if image.ndim == 3 else warped[..., 0]
+    return warped_image, warped_mask
+
+
+class CachedElasticTransform(A.DualTransform):
+    """Drop-in replacement for A.ElasticTransform with a bank of cached fields.
+
+    Each call picks one of `bank_size` seeds, so after the first bank_size calls
+    per image shape every deformation is a cache hit and costs one remap per
+    target, about as much as a flip. albumentations passes image and mask to
+    separate apply methods, so unlike elastic_deform they are warped by two
+    remap calls; the mask uses nearest neighbour interpolation and keeps its
+    values. Use it inside A.Compose or AugmentationEngine like any other
+    albumentations transform.
+
+    Args:
+    - alpha: Displacement strength in pixels. Default is 120.
+    - sigma: Smoothing of the displacement in pixels. Default is 6.
+    - bank_size: Number of distinct displacement fields. Default is 64.
+    - scale: Downsampling factor of the fields. Default is 4.
+    - p: Probability of applying the transform. Default is 0.5.
+    """
+
+    def __init__(self, alpha=120, sigma=6, bank_size=64, scale=4, p=0.5):
+        super().__init__(p=p)
+        self.alpha = alpha
+        self.sigma = sigma
+        self.bank_size = bank_size
+        self.scale = scale
+
+    def get_params(self):
+        # albumentations >= 2 seeds self.py_random, older versions use the global generator
+        generator = getattr(self, "py_random", random)
+        return {"field_seed": generator.randrange(self.bank_size)}
+
+    def get_params_dependent_on_data(self, params, data):
+        shape = data["image"].shape[:2] if "image" in data else data["shape"][:2]
+        return {"maps": elastic_maps(tuple(shape), self.alpha, self.sigma, params["field_seed"], self.scale)}
+
+    # albumentations < 2
+    @property
+    def targets_as_params(self):
+        return ["image"]
+
+    def get_params_dependent_on_targets(self, params):
+        return self.get_params_dependent_on_data(params, params)
+
+    def apply(self, img, maps=None, **params):
+        return cv2.remap(img, maps[0], maps[1], cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+
+    def apply_to_mask(self, mask, maps=None, **params):
+        return cv2.remap(mask, maps[0], maps[1], cv2.INTER_NEAREST, borderMode=cv2.BORDER_CONSTANT)
+
+    def get_transform_init_args_names(self):
+        return ("alpha", "sigma", "bank_size", "scale")
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=(512, 256, 3), dtype=np.uint8)
+    mask = np.zeros((512, 256), dtype=np.uint8)
+    mask[200:300, 100:150] = 255
+    n = 200
+
+    for name, aug in (
+        ("A.ElasticTransform", A.ElasticTransform(alpha=120, sigma=6, p=1)),
+        ("CachedElasticTransform", CachedElasticTransform(alpha=120, sigma=6, p=1)),
+        ("A.HorizontalFlip", A.HorizontalFlip(p=1)),
+    ):
+        start = time.time()
+        for _ in range(n):
+            aug(image=image, mask=mask)
+        end = time.time()
+        print(f"{name}: {(end - start) / n * 1000:.2f} ms per image/mask pair")
+
+    start = time.time()
+    for i in range(n):
+        elastic_deform(image, mask, alpha=120, sigma=6, seed=i % 64)
+    end = time.time()
+    print(f"elastic_deform (single remap): {(end - start) / n * 1000:.2f} ms per image/mask pair")
@@ -0,0 +1,162 @@
+import numpy as np
+
+# Upper bound of candidate pairs evaluated at once by iou_pairs (about 100 MB of float64 temporaries)
+PAIR_BUDGET = 1 << 21
+
+
+def to_corners(rects):
+    """Convert (x, y, width, height) rectangles to (x1, y1, x2, y2) corners.
+
+    Args:
+    - rects: Array-like of shape (N, 4) or (4,).
+
+    Returns:
+    - np.ndarray: float64 array of the same shape.
+    """
+    rects = np.asarray(rects, dtype=np.float64)
+    corners = rects.copy()
+    corners[..., 2:] += rects[..., :2]
+    return corners
+
+
+def iou(rects1, rects2):
+    """Element-wise IoU of two aligned rectangle sets.
+
+    Same result as calculate_IoU applied to zip(rects1, rects2).
+
+    Args:
+    - rects1, rects2: Arrays of shape (N, 4) with (x, y, width, height) rows.
+
+    Returns:
+    - np.ndarray: IoU per row, shape (N,).
+    """
+    a, b = to_corners(rects1), to_corners(rects2)
+    if a.shape != b.shape:
+        raise ValueError(f"Rectangle sets must be aligned, got {a.shape} and {b.shape}")
+    return _iou(a, b)
+
+
+def iou_matrix(rects1, rects2, sparse=False):
+    """IoU of every rectangle in rects1 with every rectangle in rects2.
+
+    Args:
+    - rects1: Array of shape (N, 4) with (x, y, width, height) rows.
+    - rects2: Array of shape (M, 4) with (x, y, width, height) rows.
+    - sparse: Return a scipy.sparse CSR matrix built from iou_pairs instead of a dense array.
+      Use this when N * M does not fit into memory.
+
+    Returns:
+    - np.ndarray or scipy.sparse.csr_matrix: IoU matrix of shape (N, M).
+    """
+    if sparse:
+        from scipy.sparse import csr_matrix
+
+        rows, cols, values = iou_pairs(rects1, rects2)
+        return csr_matrix((values, (rows, cols)), shape=(len(rects1), len(rects2)))
+    a, b = to_corners(rects1), to_corners(rects2)
+    return _iou(a[:, None, :], b[None, :, :])
+
+
+def iou_pairs(rects1, rects2, min_iou=0.0, pair_budget=PAIR_BUDGET):
+    """Find all overlapping pairs between two rectangle sets with a grid index.
+
+    rects2 is bucketed into a uniform grid by its top-left corner, with the
+    cell size equal to its largest width or height. A rectangle of rects2 can
+    only overlap a rectangle of rects1 if that corner lies within
+    (x1 - cell, x2) x (y1 - cell, y2), so only the few grid cells covering this
+    window are searched. Cells are sorted by (column, row), which makes every
+    grid column of the window one contiguous range found by binary search.
+    Candidates are evaluated in vectorized blocks of at most pair_budget pairs.
+
+    Args:
+    - rects1: Array of shape (N, 4) with (x, y, width, height) rows.
+    - rects2: Array of shape (M, 4) with (x, y, width, height) rows.
+    - min_iou: Only pairs with IoU > min_iou are returned. Default is 0.
+    - pair_budget: Maximum number of candidate pairs evaluated at once.
+
+    Returns:
+    - (rows, cols, values): Indices into rects1 and rects2 and the IoU of each pair.
+    """
+    a, b = to_corners(rects1).reshape(-1, 4), to_corners(rects2).reshape(-1, 4)
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+    if not len(a) or not len(b):
+        return empty
+
+    # Grid over rects2, cells sorted by (column, row)
+    cell = max(np.max(b[:, 2:] - b[:, :2]), np.finfo(np.float64).eps)
+    origin = b[:, :2].min(axis=0)
+    b_cells = np.floor((b[:, :2] - origin) / cell).astype(np.int64)
+    n_columns, n_rows = b_cells.max(axis=0) + 1
+    keys = b_cells[:, 0] * n_rows + b_cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    b_sorted = b[order]
+
+    # Grid window of every rectangle of rects1, clipped to the grid
+    first = np.floor((a[:, :2] - cell - origin) / cell).astype(np.int64)
+    last = np.floor((a[:, 2:] - origin) / cell).astype(np.int64)
+    first = np.maximum(first, 0)
+    last = np.minimum(last, [n_columns - 1, n_rows - 1])
+    n_window_columns = np.maximum(last[:, 0] - first[:, 0] + 1, 0)
+
+    # One query per (rectangle, grid column): a contiguous range of rects2 in sorted order
+    query_rows = np.repeat(np.arange(len(a)), n_window_columns)
+    query_columns = first[query_rows, 0] + _ranks(n_window_columns)
+    lo = np.searchsorted(keys, query_columns * n_rows + first[query_rows, 1], side="left")
+    hi = np.searchsorted(keys, query_columns * n_rows + last[query_rows, 1] + 1, side="left")
+    counts = np.maximum(hi - lo, 0)
+    if not counts.sum():
+        return empty
+
+    # Split the queries into blocks whose candidate count stays within the budget
+    ends = np.cumsum(counts)
+    bounds = np.searchsorted(ends, np.arange(pair_budget, ends[-1], pair_budget), side="left")
+    bounds = np.unique(np.concatenate([[0], bounds, [len(counts)]]))
+
+    results = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        block_counts = counts[start:stop]
+        queries = np.repeat(np.arange(start, stop), block_counts)
+        rows = query_rows[queries]
+        cols = lo[queries] + _ranks(block_counts)
+        values = _iou(a[rows], b_sorted[cols])
+        keep = values > min_iou
+        results.append((rows[keep], order[cols[keep]], values[keep]))
+
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+
+def _ranks(counts):
+    # [0, 1, .., counts[0] - 1, 0, 1, .., counts[1] - 1, ...]
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def _iou(a, b):
+    # a and b are broadcastable corner arrays (..., 4)
+    width = np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0])
+    height = np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1])
+    overlap = np.clip(width, 0, None) * np.clip(height, 0, None)
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - overlap
+    return np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 200_000
+    xy = rng.uniform(0, 10_000, size=(n, 2))
+    ground_truth = np.hstack([xy, rng.uniform(5, 30, size=(n, 2))])
+    predicted = ground_truth + rng.normal(0, 3, size=(n, 4))
+
+    start = time.time()
+    ious = iou(ground_truth, predicted)
+    end = time.time()
+    print(f"Element-wise IoU of {n} pairs: {end - start:.4f} seconds, mean {ious.mean():.3f}")
+
+    start = time.time()
+    rows, cols, values = iou_pairs(ground_truth, predicted)
+    end = time.time()
+    print(f"Pairwise IoU {n} x {n}: {len(values)} overlapping pairs in {end - start:.3f} seconds")
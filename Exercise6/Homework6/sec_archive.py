@@ -0,0 +1,339 @@
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+import flammkuchen as fl
+import numpy as np
+import tables
+
+# Bytes of decompressed row blocks kept per archive
+CACHE_BYTES = 64 << 20
+
+# Rows per block of arrays that are stored contiguously (not chunked)
+BLOCK_ROWS = 1 << 12
+
+# Attributes written by flammkuchen itself, not part of the data
+IO_PREFIX = "DEEPDISH_IO"
+
+
+class LRUCache:
+    """Least recently used cache of arrays with a byte budget.
+
+    Args:
+    - max_bytes: Total size of the cached arrays. Arrays larger than this are never cached.
+    """
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def get(self, key, load):
+        """Cached value of key, or load() stored as the most recent entry."""
+        if key in self._items:
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+        self.misses += 1
+        value = load()
+        if value.nbytes <= self.max_bytes:
+            # Cached blocks are shared by all callers
+            value.flags.writeable = False
+            self._items[key] = value
+            self.nbytes += value.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return value
+
+    def __len__(self):
+        return len(self._items)
+
+
+class LazyArray:
+    """Read-only NumPy-like view of an HDF5 array inside a .sec archive.
+
+    Indexing reads only the rows of the first axis that are selected, in
+    blocks of one HDF5 chunk (or BLOCK_ROWS rows for contiguous arrays);
+    decompressed blocks are kept in the archive's LRU cache, so nearby or
+    repeated slices are served from memory. np.asarray(view) reads the
+    whole array.
+    """
+
+    def __init__(self, node, cache):
+        self.node = node
+        self.cache = cache
+        self.shape = tuple(int(n) for n in node.shape)
+        self.dtype = node.dtype
+        chunkshape = getattr(node, "chunkshape", None)
+        self.block_rows = max(1, chunkshape[0] if chunkshape else BLOCK_ROWS)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"LazyArray({self.node._v_pathname!r}, shape={self.shape}, dtype={self.dtype})"
+
+    def _block(self, i):
+        lo = i * self.block_rows
+        return self.cache.get((self.node._v_pathname, i), lambda: self.node[lo:lo + self.block_rows])
+
+    def _rows(self, rows):
+        """Copy of the given rows (sorted or not), read block by block through the cache."""
+        out = np.empty((len(rows),) + self.shape[1:], dtype=self.dtype)
+        blocks = rows // self.block_rows
+        for i in np.unique(blocks):
+            selected = np.flatnonzero(blocks == i)
+            out[selected] = self._block(i)[rows[selected] - i * self.block_rows]
+        return out
+
+    def __getitem__(self, key):
+        key = key if isinstance(key, tuple) else (key,)
+        first, rest = key[0], key[1:]
+        if first is Ellipsis:
+            return self.read()[key]
+        if isinstance(first, (int, np.integer)):
+            if not -len(self) <= first < len(self):
+                raise IndexError(f"index {first} is out of bounds for axis 0 with size {len(self)}")
+            return self._rows(np.array([first % len(self)]))[(0,) + rest]
+        if isinstance(first, slice):
+            # Only the selected rows, never an index over the whole axis
+            rows = np.arange(*first.indices(len(self)))
+        else:
+            rows = self._row_indices(first)
+        return self._rows(rows.reshape(-1)).reshape(rows.shape + self.shape[1:])[(slice(None),) * rows.ndim + rest]
+
+    def _row_indices(self, index):
+        """Non-negative row numbers of an integer or boolean index array along the first axis."""
+        index = np.asarray(index)
+        if index.dtype == bool:
+            if index.shape != (len(self),):
+                raise IndexError(f"boolean index of shape {index.shape} does not match axis 0 with size {len(self)}")
+            return np.flatnonzero(index)
+        if index.size and index.dtype.kind not in "iu":
+            raise IndexError("only integers, slices, Ellipsis and integer or boolean arrays are valid indices")
+        index = index.astype(np.int64)
+        if index.size and not (-len(self) <= index.min() and index.max() < len(self)):
+            raise IndexError(f"index out of bounds for axis 0 with size {len(self)}")
+        return index % max(len(self), 1)
+
+    def iter_chunks(self, rows=None):
+        """Iterate over (start, block) with blocks of rows rows along the first axis.
+
+        Sequential scans read the file directly and do not go through the
+        cache, so they do not evict blocks of random accesses.
+
+        Args:
+        - rows: Rows per block. Default is the HDF5 chunk height (or BLOCK_ROWS).
+        """
+        rows = rows or self.block_rows
+        for start in range(0, len(self), rows):
+            yield start, self.node[start:start + rows]
+
+    def read(self):
+        """The whole array."""
+        return self.node.read()
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.read()
+        return array if dtype is None else array.astype(dtype, copy=False)
+
+
+def _attribute(value):
+    if isinstance(value, np.bytes_):
+        return value.decode("utf-8")
+    return value
+
+
+class SecList(Sequence):
+    """Lazy list or tuple of a .sec archive; items are read when they are accessed."""
+
+    def __init__(self, archive, node):
+        self.archive = archive
+        self.node = node
+        self.kind, length = node._v_title.split(":")
+        self._length = int(length)
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return f"SecList({self.node._v_pathname!r}, {self.kind}, {len(self)} items)"
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"index {index} is out of range for {len(self)} items")
+        return self.archive._child(self.node, f"i{index % len(self)}")
+
+    def read(self):
+        """The items as list or tuple, like fl.load."""
+        items = [np.asarray(item) if isinstance(item, LazyArray) else item for item in self]
+        items = [item.read() if isinstance(item, (SecList, SecGroup)) else item for item in items]
+        return tuple(items) if self.kind == "tuple" else items
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.read(), dtype=dtype)
+
+
+class SecGroup(Mapping):
+    """Lazy dictionary of a .sec archive; values are read when they are accessed."""
+
+    def __init__(self, archive, node):
+        self.archive = archive
+        self.node = node
+
+    def keys(self):
+        """Names of the entries, read from the group header only."""
+        names = list(self.node._v_children)
+        names += [name for name in self.node._v_attrs._f_list("user") if not name.startswith(IO_PREFIX)]
+        return names
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return f"SecGroup({self.node._v_pathname!r}, keys={self.keys()})"
+
+    def __getitem__(self, key):
+        try:
+            return self.archive._child(self.node, key)
+        except ValueError:
+            raise KeyError(key) from None
+
+    def read(self):
+        """The whole group, like fl.load."""
+        return fl.load(self.archive.path, group=self.node._v_pathname)
+
+
+class SecArchive(SecGroup):
+    """Lazy, read-only access to a flammkuchen .sec (HDF5) archive.
+
+    Opening reads the file header only. Keys come from the HDF5 group
+    headers, so listing them never touches the data. Values are returned as
+    views: numeric arrays as LazyArray (slicing and chunked iteration, with
+    decompressed blocks in an LRU cache shared by the whole archive), lists
+    and tuples as SecList, dictionaries as SecGroup. Scalars and short tuples
+    of scalars, which flammkuchen stores as HDF5 attributes, are returned
+    directly. Everything else (pickled objects, DataFrames, sparse matrices)
+    falls back to fl.load of that entry.
+
+    archive["a/b"] is archive["a"]["b"]; archive.load("a") reads an entry
+    completely, like fl.load(path, group="/a").
+
+    Args:
+    - path: .sec file.
+    - cache_bytes: Byte budget of the block cache. Default is 64 MB.
+    """
+
+    def __init__(self, path, cache_bytes=CACHE_BYTES):
+        self.path = str(path)
+        self.file = tables.open_file(self.path, mode="r")
+        self.cache = LRUCache(cache_bytes)
+        super().__init__(self, self.file.root)
+
+    def __repr__(self):
+        return f"SecArchive({self.path!r}, keys={self.keys()})"
+
+    def __getitem__(self, key):
+        value = self
+        for part in key.strip("/").split("/"):
+            value = SecGroup.__getitem__(value, part)
+        return value
+
+    def load(self, key):
+        """Entry key read completely, like fl.load(path, group="/" + key)."""
+        value = self[key]
+        if isinstance(value, LazyArray):
+            return value.read()
+        return value.read() if isinstance(value, (SecList, SecGroup)) else value
+
+    def _child(self, group, name):
+        if name in group._v_children:
+            return self._wrap(group._v_children[name])
+        if name in group._v_attrs._f_list("user"):
+            return _attribute(group._v_attrs[name])
+        raise ValueError(f"{group._v_pathname} has no entry {name!r}")
+
+    def _wrap(self, node):
+        if isinstance(node, tables.link.SoftLink):
+            node = node()
+        title = node._v_title
+        if isinstance(node, tables.Group):
+            if title.startswith("nonetype:"):
+                return None
+            if title.startswith(("list:", "tuple:")):
+                items = SecList(self, node)
+                # Tuples of scalars live in the group header; read them right away
+                if items.kind == "tuple" and not node._v_nchildren:
+                    return items.read()
+                return items
+            if ((not title or title.startswith("dict:")) and "pandas_type" not in node._v_attrs
+                    and not any(name.startswith("__pair") for name in node._v_children)):
+                return SecGroup(self, node)
+        elif (isinstance(node, tables.Array) and not isinstance(node, tables.VLArray) and node.shape != ()
+              and "strtype" not in node._v_attrs and "zeroarray_dtype" not in node._v_attrs):
+            return LazyArray(node, self.cache)
+        # Pickled objects, strings, DataFrames, sparse matrices, namespaces, ...
+        return fl.load(self.path, group=node._v_pathname)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+
+    path = os.path.join(tempfile.mkdtemp(), "large.sec")
+    rng = np.random.default_rng(0)
+    fl.save(path, {"images": rng.integers(0, 255, (2000, 256, 256), dtype=np.uint8),
+                   "labels": rng.integers(0, 10, 2000)}, compression="blosc")
+    print(f"Archive of {os.path.getsize(path) / 2 ** 20:.0f} MB")
+
+    tracemalloc.start()
+    start = time.time()
+    data = fl.load(path)
+    batch = data["images"][100:132]
+    end = time.time()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"fl.load + slice: {end - start:.3f} seconds, peak memory {peak / 2 ** 20:.0f} MB")
+    del data
+
+    tracemalloc.start()
+    start = time.time()
+    with SecArchive(path) as archive:
+        keys = archive.keys()
+        opened = time.time()
+        batch = archive["images"][100:132]
+        end = time.time()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"SecArchive: open and keys {keys} in {opened - start:.4f} seconds, slice {batch.shape} "
+          f"in {end - opened:.3f} seconds, peak memory {peak / 2 ** 20:.0f} MB")
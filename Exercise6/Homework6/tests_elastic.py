@@ -0,0 +1,67 @@
+import unittest
+
+import albumentations as A
+import cv2
+import numpy as np
+
+from elastic import CachedElasticTransform, elastic_deform, elastic_maps
+
+SHAPE = (512, 256)
+
+
+def mean_displacement(map_x, map_y):
+    grid_x, grid_y = np.meshgrid(np.arange(SHAPE[1]), np.arange(SHAPE[0]))
+    return (np.abs(map_x - grid_x).mean() + np.abs(map_y - grid_y).mean()) / 2
+
+
+class TestElastic(unittest.TestCase):
+
+    def setUp(self):
+        self.image = np.random.default_rng(0).integers(0, 256, size=SHAPE + (3,), dtype=np.uint8)
+        self.mask = np.zeros(SHAPE, dtype=np.uint8)
+        self.mask[200:300, 100:150] = 255
+
+    def test_displacement_matches_albumentations(self):
+        transform = A.ElasticTransform(alpha=120, sigma=6, p=1)
+        expected = []
+        for seed in range(5):
+            transform.set_random_seed(seed)
+            params = transform.get_params_dependent_on_data({"shape": SHAPE}, {"image": self.image})
+            expected.append(mean_displacement(params["map_x"], params["map_y"]))
+        expected = np.mean(expected)
+        for scale in (1, 2, 4):
+            displacement = np.mean([
+                mean_displacement(*cv2.convertMaps(*elastic_maps(SHAPE, 120, 6, seed, scale), cv2.CV_32FC1))
+                for seed in range(5)
+            ])
+            self.assertAlmostEqual(displacement / expected, 1, delta=0.15, msg=f"scale {scale}")
+
+    def test_deterministic_per_seed(self):
+        image, mask = elastic_deform(self.image, self.mask, seed=3)
+        again, again_mask = elastic_deform(self.image, self.mask, seed=3)
+        np.testing.assert_array_equal(image, again)
+        np.testing.assert_array_equal(mask, again_mask)
+        self.assertFalse(np.array_equal(image, elastic_deform(self.image, self.mask, seed=4)[0]))
+
+        transform = CachedElasticTransform(p=1)
+        results = []
+        for _ in range(2):
+            transform.set_random_seed(7)
+            results.append(transform(image=self.image, mask=self.mask))
+        np.testing.assert_array_equal(results[0]["image"], results[1]["image"])
+        np.testing.assert_array_equal(results[0]["mask"], results[1]["mask"])
+
+    def test_mask_stays_binary(self):
+        transform = CachedElasticTransform(p=1, bank_size=4)
+        for seed in range(4):
+            _, mask = elastic_deform(self.image, self.mask, seed=seed)
+            self.assertTrue(set(np.unique(mask)) <= {0, 255})
+            self.assertEqual(mask.dtype, np.uint8)
+            transform.set_random_seed(seed)
+            mask = transform(image=self.image, mask=self.mask)["mask"]
+            self.assertTrue(set(np.unique(mask)) <= {0, 255})
+            self.assertGreater(np.count_nonzero(mask), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
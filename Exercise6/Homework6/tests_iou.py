@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from iou import iou, iou_matrix, iou_pairs
+
+
+def calculate_IoU(rec1, rec2):
+    # Reference implementation from homework_6.ipynb
+    x1, y1, width1, height1 = rec1
+    x2, y2, width2, height2 = rec2
+    x_left = max(x1, x2)
+    y_bottom = max(y1, y2)
+    x_right = min(x1 + width1, x2 + width2)
+    y_top = min(y1 + height1, y2 + height2)
+    if x_left > x_right or y_bottom > y_top:
+        return 0
+    area_of_overlap = (x_right - x_left) * (y_top - y_bottom)
+    area_of_union = width1 * height1 + width2 * height2 - area_of_overlap
+    return area_of_overlap / area_of_union
+
+
+class TestIoU(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.rects1 = np.hstack([rng.uniform(0, 50, (300, 2)), rng.uniform(1, 20, (300, 2))])
+        self.rects2 = np.hstack([rng.uniform(0, 50, (200, 2)), rng.uniform(1, 20, (200, 2))])
+
+    def test_elementwise_matches_reference(self):
+        expected = [calculate_IoU(r1, r2) for r1, r2 in zip(self.rects1[:200], self.rects2)]
+        np.testing.assert_allclose(iou(self.rects1[:200], self.rects2), expected)
+
+    def test_matrix_matches_reference(self):
+        matrix = iou_matrix(self.rects1[:20], self.rects2[:30])
+        expected = [[calculate_IoU(r1, r2) for r2 in self.rects2[:30]] for r1 in self.rects1[:20]]
+        np.testing.assert_allclose(matrix, expected)
+
+    def test_pairs_match_dense_matrix(self):
+        dense = iou_matrix(self.rects1, self.rects2)
+        # A small budget forces several blocks
+        rows, cols, values = iou_pairs(self.rects1, self.rects2, pair_budget=500)
+        sparse = np.zeros_like(dense)
+        sparse[rows, cols] = values
+        np.testing.assert_allclose(sparse, dense)
+        np.testing.assert_allclose(iou_matrix(self.rects1, self.rects2, sparse=True).toarray(), dense)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+import flammkuchen as fl
+import numpy as np
+import tables
+
+from sec_archive import LazyArray, SecArchive, SecList
+
+RECTANGLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rectangles_dsss.sec")
+
+
+class TestSecArchive(unittest.TestCase):
+
+    def setUp(self):
+        # The flammkuchen layout of {"X": X, "parts": [Y, 3]}, with X compressed in chunks of 64 rows
+        rng = np.random.default_rng(3)
+        self.X = rng.normal(size=(1000, 5))
+        self.Y = rng.integers(0, 9, (40, 6, 6)).astype(np.int16)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "test.sec")
+        with tables.open_file(self.path, mode="w") as f:
+            f.create_carray(f.root, "X", obj=self.X, chunkshape=(64, 5), filters=tables.Filters(5, "blosc"))
+            parts = f.create_group(f.root, "parts", "list:2")
+            f.create_array(parts, "i0", obj=self.Y)
+            parts._v_attrs.i1 = 3
+
+    def test_rectangles_match_fl_load(self):
+        expected = fl.load(RECTANGLES_PATH)
+        with SecArchive(RECTANGLES_PATH) as archive:
+            self.assertEqual(sorted(archive.keys()), sorted(expected.keys()))
+            ground_truth = archive.get("ground_truth")
+            self.assertIsInstance(ground_truth, SecList)
+            self.assertEqual(ground_truth[7], expected["ground_truth"][7])
+            self.assertEqual(archive.load("predicted"), expected["predicted"])
+            np.testing.assert_array_equal(np.asarray(ground_truth), np.array(expected["ground_truth"]))
+
+    def test_slices_match_numpy(self):
+        with SecArchive(self.path) as archive:
+            X = archive["X"]
+            self.assertIsInstance(X, LazyArray)
+            for key in [3, -1, slice(10, 900, 7), slice(None, None, -5), (slice(60, 200), 2),
+                        np.array([999, 0, 64, 64]), self.X[:, 0] > 1, [5, -3], (np.array([[1, 2], [999, -1]]), 4),
+                        slice(5, 5), np.array([], dtype=np.int64)]:
+                np.testing.assert_array_equal(X[key], self.X[key])
+            for key in (np.array([3, 1000]), np.array([-1001]), np.ones(10, dtype=bool), np.array([1.5])):
+                with self.assertRaises(IndexError):
+                    X[key]
+            np.testing.assert_array_equal(np.concatenate([block for _, block in X.iter_chunks(100)]), self.X)
+            np.testing.assert_array_equal(archive["parts"][0][5:9, 2], self.Y[5:9, 2])
+            self.assertEqual(archive["parts"][1], 3)
+            self.assertEqual(fl.load(self.path)["parts"][1], archive.load("parts")[1])
+
+    def test_cache_stays_within_budget(self):
+        # Four blocks of 64 rows fit into the cache
+        with SecArchive(self.path, cache_bytes=4 * 64 * 5 * 8) as archive:
+            X = archive["X"]
+            X[:640]
+            self.assertLessEqual(archive.cache.nbytes, archive.cache.max_bytes)
+            self.assertEqual(len(archive.cache), 4)
+            misses = archive.cache.misses
+            X[400:640]
+            self.assertEqual(archive.cache.misses, misses)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import numpy as np
+
+
+def _divide(numerator, denominator):
+    # Element-wise ratio with 0 where the denominator is 0 (like zero_division=0 in scikit-learn)
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out if out.ndim else float(out)
+
+
+class MetricsAccumulator:
+    """Confusion matrix that is updated batch by batch; all metrics are derived from it.
+
+    Each update is a single bincount over true * n_classes + predicted, so an
+    arbitrarily long stream of predictions costs one vectorized pass and only
+    n_classes**2 counters of memory. Accumulators of different workers or
+    chunks are combined with merge.
+
+    Rows of the confusion matrix are the true labels and columns the predicted
+    labels, as in sklearn.metrics.confusion_matrix.
+
+    Args:
+    - labels: Fixed list of class labels. Default is to collect the labels from the updates.
+    """
+
+    def __init__(self, labels=None):
+        self.fixed = labels is not None
+        self.labels = np.unique(np.asarray(labels)) if labels is not None else np.array([], dtype=np.int64)
+        self.matrix = np.zeros((len(self.labels),) * 2, dtype=np.int64)
+
+    def _grow(self, labels):
+        labels = np.union1d(self.labels, labels)
+        if len(labels) == len(self.labels):
+            return
+        if self.fixed:
+            unknown = np.setdiff1d(labels, self.labels)
+            raise ValueError(f"Labels {unknown.tolist()} are not in the labels of the accumulator")
+        # Move the counts to the positions of the old labels in the extended label list
+        positions = np.searchsorted(labels, self.labels)
+        matrix = np.zeros((len(labels),) * 2, dtype=np.int64)
+        matrix[np.ix_(positions, positions)] = self.matrix
+        self.labels, self.matrix = labels, matrix
+
+    def update(self, y_true, y_pred):
+        """Add a batch of true and predicted labels."""
+        y_true = np.asarray(y_true).ravel()
+        y_pred = np.asarray(y_pred).ravel()
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"y_true and y_pred have different lengths ({len(y_true)} != {len(y_pred)})")
+        if not len(y_true):
+            return self
+        self._grow(np.unique(np.concatenate([y_true, y_pred])))
+        n = len(self.labels)
+        codes = np.searchsorted(self.labels, y_true) * n + np.searchsorted(self.labels, y_pred)
+        self.matrix += np.bincount(codes, minlength=n * n).reshape(n, n)
+        return self
+
+    def merge(self, *others):
+        """Add the counts of other accumulators, e.g. of parallel workers."""
+        for other in others:
+            self._grow(other.labels)
+            positions = np.searchsorted(self.labels, other.labels)
+            self.matrix[np.ix_(positions, positions)] += other.matrix
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    @property
+    def confusion_matrix(self):
+        return self.matrix.copy()
+
+    @property
+    def n_samples(self):
+        return int(self.matrix.sum())
+
+    def _index(self, pos_label):
+        index = np.searchsorted(self.labels, pos_label)
+        if index == len(self.labels) or self.labels[index] != pos_label:
+            raise ValueError(f"pos_label={pos_label!r} is not a known label")
+        return index
+
+    def _average(self, numerator, denominator, average, pos_label):
+        if average is None:
+            return _divide(numerator, denominator)
+        if average == "binary":
+            index = self._index(pos_label)
+            return _divide(numerator[index], denominator[index])
+        if average == "micro":
+            return _divide(numerator.sum(), denominator.sum())
+        if average == "macro":
+            return float(_divide(numerator, denominator).mean()) if len(self.labels) else 0.0
+        if average == "weighted":
+            support = self.matrix.sum(axis=1)
+            return float(_divide((_divide(numerator, denominator) * support).sum(), support.sum()))
+        raise ValueError(f"Unknown average '{average}', choose one of None, 'binary', 'micro', 'macro', 'weighted'")
+
+    def accuracy(self):
+        return _divide(np.trace(self.matrix), self.matrix.sum())
+
+    def precision(self, average="binary", pos_label=1):
+        """TP / (TP + FP). average is None (per class), 'binary', 'micro', 'macro' or 'weighted'."""
+        return self._average(np.diag(self.matrix), self.matrix.sum(axis=0), average, pos_label)
+
+    def recall(self, average="binary", pos_label=1):
+        """TP / (TP + FN). average as for precision."""
+        return self._average(np.diag(self.matrix), self.matrix.sum(axis=1), average, pos_label)
+
+    def f1(self, average="binary", pos_label=1):
+        """2 TP / (2 TP + FP + FN), the harmonic mean of precision and recall. average as for precision."""
+        tp = np.diag(self.matrix)
+        return self._average(2 * tp, self.matrix.sum(axis=0) + self.matrix.sum(axis=1), average, pos_label)
+
+    def report(self, average="binary", pos_label=1):
+        """Accuracy, precision, recall and F1 as a dict."""
+        return {
+            "accuracy": self.accuracy(),
+            "precision": self.precision(average, pos_label),
+            "recall": self.recall(average, pos_label),
+            "f1": self.f1(average, pos_label),
+        }
+
+    def __repr__(self):
+        return f"MetricsAccumulator(labels={self.labels.tolist()}, n_samples={self.n_samples})"
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n, batch = 50_000_000, 5_000_000
+    accumulator = MetricsAccumulator(labels=[0, 1, 2])
+    start = time.time()
+    for _ in range(0, n, batch):
+        y_true = rng.integers(0, 3, size=batch, dtype=np.int8)
+        y_pred = np.where(rng.random(batch) < 0.8, y_true, rng.integers(0, 3, size=batch, dtype=np.int8))
+        accumulator.update(y_true, y_pred)
+    end = time.time()
+    print(f"{accumulator.n_samples} predictions in {end - start:.3f} seconds (including sampling)")
+    print(accumulator.report(average="macro"))
@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from distance_metrics import METRICS, get_metric
+from knn import KNNClassifier
+
+# Number of grid points predicted per KNNClassifier call
+BATCH_SIZE = 1 << 16
+
+
+def grid_range(X, margin=0.5):
+    """(x_range, y_range) covering the first two features of X plus a margin."""
+    return ((X[:, 0].min() - margin, X[:, 0].max() + margin),
+            (X[:, 1].min() - margin, X[:, 1].max() + margin))
+
+
+def _predict(model, points, batch_size):
+    labels = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), batch_size):
+        labels[start:start + batch_size] = np.searchsorted(model.classes_, model.predict(points[start:start + batch_size]))
+    return labels
+
+
+def decision_grid(model, x_range, y_range, coarse=16, levels=5, batch_size=BATCH_SIZE):
+    """Predicted class on a regular grid, refined only along the decision boundary.
+
+    The grid is first predicted at coarse x coarse cells. Each refinement
+    halves the cell size, but only cells with disagreeing corners (and their
+    direct neighbours, so that thin regions are not lost) get new
+    predictions. All other cells have the same label at every corner and are
+    filled from it. The number of predictions therefore grows with the length
+    of the boundary instead of the area of the grid.
+
+    Args:
+    - model: Fitted KNNClassifier (or any classifier with classes_ and predict).
+    - x_range, y_range: (min, max) of the grid.
+    - coarse: Number of cells per axis of the first grid. Default is 16.
+    - levels: Number of refinements. The final grid has coarse * 2**levels cells per axis. Default is 5.
+    - batch_size: Number of points per predict call. Default is 65536.
+
+    Returns:
+    - (xs, ys, Z, n_predicted): Grid coordinates, labels of shape (len(ys), len(xs)) and the number
+      of points that were actually predicted.
+    """
+    n = coarse * 2 ** levels + 1
+    xs = np.linspace(*x_range, n)
+    ys = np.linspace(*y_range, n)
+
+    stride = 2 ** levels
+    known = np.arange(0, n, stride)
+    gx, gy = np.meshgrid(xs[known], ys[known])
+    Z = _predict(model, np.c_[gx.ravel(), gy.ravel()], batch_size).reshape(gx.shape)
+    n_predicted = Z.size
+
+    while stride > 1:
+        # Cells whose four corners do not all agree, grown by one cell in every direction
+        differ = ((Z[:-1, :-1] != Z[1:, :-1]) | (Z[:-1, :-1] != Z[:-1, 1:])
+                  | (Z[:-1, :-1] != Z[1:, 1:]))
+        padded = np.pad(differ, 1)
+        flagged = np.zeros_like(differ)
+        for di in range(3):
+            for dj in range(3):
+                flagged |= padded[di:di + differ.shape[0], dj:dj + differ.shape[1]]
+
+        # Points of the next level inside flagged cells, without the already known corners
+        rows, cols = Z.shape
+        need = np.zeros((2 * rows - 1, 2 * cols - 1), dtype=bool)
+        for di in range(3):
+            for dj in range(3):
+                need[di:di + 2 * rows - 2:2, dj:dj + 2 * cols - 2:2] |= flagged
+        need[::2, ::2] = False
+
+        # Unflagged cells have one label at all corners; take it from the top left corner
+        Z = np.repeat(np.repeat(Z, 2, axis=0), 2, axis=1)[:2 * rows - 1, :2 * cols - 1]
+        stride //= 2
+        i, j = np.nonzero(need)
+        Z[i, j] = _predict(model, np.c_[xs[j * stride], ys[i * stride]], batch_size)
+        n_predicted += len(i)
+
+    return xs, ys, model.classes_[Z], n_predicted
+
+
+def _metric_grid(X_train, y_train, k, metric, x_range, y_range, options):
+    model = KNNClassifier(k, metric=metric).fit(X_train, y_train)
+    return decision_grid(model, x_range, y_range, **options)
+
+
+def decision_grids(X_train, y_train, k, metrics, workers=None, margin=0.5, **options):
+    """Decision grids of kNN for several metrics, computed in parallel processes.
+
+    Args:
+    - X_train, y_train: Training data, only the first two features are used.
+    - k: Number of neighbours.
+    - metrics: Dict {title: metric} or list of metrics accepted by KNNClassifier.
+    - workers: Number of worker processes. Default is the CPU count.
+    - margin: Margin of the grid around the training data. Default is 0.5.
+    - options: Passed to decision_grid (coarse, levels, batch_size).
+
+    Returns:
+    - dict: {title: (xs, ys, Z, n_predicted)}
+    """
+    if not isinstance(metrics, dict):
+        metrics = {getattr(metric, "__name__", metric): metric for metric in metrics}
+    X_train = np.asarray(X_train, dtype=np.float64)[:, :2]
+    x_range, y_range = grid_range(X_train, margin)
+
+    # Registered metrics are sent by name, so the notebook's functions never need to be pickled. Anything
+    # else (e.g. a user function that only shares a registry name) is computed here as it is.
+    resolved = {title: get_metric(metric) for title, metric in metrics.items()}
+    remote = {title: metric.name for title, metric in resolved.items() if METRICS.get(metric.name) is metric}
+    grids = {}
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), max(len(remote), 1))) as executor:
+        futures = {
+            title: executor.submit(_metric_grid, X_train, y_train, k, name, x_range, y_range, options)
+            for title, name in remote.items()
+        }
+        for title, metric in metrics.items():
+            if title not in remote:
+                grids[title] = _metric_grid(X_train, y_train, k, metric, x_range, y_range, options)
+        for title, future in futures.items():
+            grids[title] = future.result()
+    return {title: grids[title] for title in metrics}
+
+
+def plot_decision_boundaries(X_train, y_train, k, metrics, columns=3, workers=None, **options):
+    """Plot the kNN decision regions of every metric next to each other.
+
+    The grids are computed by decision_grids in worker processes; only the
+    plotting happens in the calling process.
+    """
+    import matplotlib.pyplot as plt
+
+    grids = decision_grids(X_train, y_train, k, metrics, workers=workers, **options)
+    rows = -(-len(grids) // columns)
+    fig = plt.figure(figsize=(5 * columns, 5 * rows))
+    for i, (title, (xs, ys, Z, _)) in enumerate(grids.items()):
+        plt.subplot(rows, columns, i + 1)
+        plt.pcolormesh(xs, ys, Z, cmap='gray', shading='nearest')
+        plt.scatter(X_train[:, 0], X_train[:, 1], c=y_train, cmap='coolwarm', marker='x')
+        plt.xlabel('PC1')
+        plt.ylabel('PC2')
+        plt.title(f'{title}')
+    plt.tight_layout()
+    return fig
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    X_train = rng.normal(size=(300, 2)) * 2
+    y_train = (X_train[:, 0] * X_train[:, 1] + rng.normal(size=len(X_train)) > 0).astype(int)
+    metrics = ("manhattan", "euclidean", "minkowski_p3", "chebyshev", "cosine")
+
+    model = KNNClassifier(5).fit(X_train, y_train)
+    x_range, y_range = grid_range(X_train)
+    start = time.time()
+    xs, ys, Z, n_predicted = decision_grid(model, x_range, y_range)
+    end = time.time()
+    print(f"Adaptive {Z.shape} grid: {n_predicted} of {Z.size} points predicted in {end - start:.3f} seconds")
+
+    xx, yy = np.meshgrid(xs, ys)
+    start = time.time()
+    dense = model.predict(np.c_[xx.ravel(), yy.ravel()]).reshape(xx.shape)
+    end = time.time()
+    print(f"Dense {Z.shape} grid in {end - start:.3f} seconds, {np.count_nonzero(dense != Z)} points differ")
+
+    start = time.time()
+    grids = decision_grids(X_train, y_train, 5, metrics)
+    end = time.time()
+    print(f"{len(grids)} metrics in {end - start:.3f} seconds")
@@ -0,0 +1,199 @@
+import numpy as np
+from scipy.spatial.distance import cdist
+
+# Column tiles of minkowski_reduced are sized to stay within L2 cache
+TILE_BYTES = 1 << 20
+
+
+def euclidean_distances(X, Y, Y_sq_norms=None, squared=False):
+    """Euclidean distances between the rows of X and Y.
+
+    Uses ||x - y||^2 = ||x||^2 + ||y||^2 - 2 x.y, so the whole block is one
+    matrix product instead of an (n, m, d) difference array.
+
+    Args:
+    - X: Array of shape (n, d).
+    - Y: Array of shape (m, d).
+    - Y_sq_norms: Optional precomputed squared norms of the rows of Y.
+    - squared: Return squared distances (same neighbour order, no square root).
+
+    Returns:
+    - np.ndarray: Distances of shape (n, m).
+    """
+    X_sq_norms = np.einsum("ij,ij->i", X, X)
+    if Y_sq_norms is None:
+        Y_sq_norms = np.einsum("ij,ij->i", Y, Y)
+    distances = X @ Y.T
+    distances *= -2
+    distances += X_sq_norms[:, None]
+    distances += Y_sq_norms[None, :]
+    # Rounding can make distances of (near) identical points slightly negative
+    np.maximum(distances, 0, out=distances)
+    return distances if squared else np.sqrt(distances, out=distances)
+
+
+def manhattan_distances(X, Y):
+    """Sum of absolute feature differences (L1), computed in a single C loop by scipy."""
+    return cdist(X, Y, "cityblock")
+
+
+def chebyshev_distances(X, Y):
+    """Maximum absolute feature difference, computed in a single C loop by scipy."""
+    return cdist(X, Y, "chebyshev")
+
+
+def minkowski_reduced(X, Y, p, tile_bytes=TILE_BYTES):
+    """Sum of |x - y|^p over the features, i.e. the Minkowski distance to the power p.
+
+    The sum is accumulated one feature at a time on column tiles of about
+    tile_bytes, so the temporaries stay in cache and there is never an
+    (n, m, d) difference array. Integer powers use repeated multiplication,
+    which is much faster than np.power.
+    """
+    distances = np.zeros((len(X), len(Y)))
+    tile = max(1, tile_bytes // (8 * max(len(X), 1)))
+    integer_p = float(p).is_integer()
+    for start in range(0, len(Y), tile):
+        Y_tile = Y[start:start + tile]
+        out = distances[:, start:start + tile]
+        diff = np.empty(out.shape)
+        power = np.empty(out.shape)
+        for f in range(X.shape[1]):
+            np.subtract(X[:, f, None], Y_tile[None, :, f], out=diff)
+            np.abs(diff, out=diff)
+            if integer_p:
+                power[...] = diff
+                for _ in range(int(p) - 1):
+                    power *= diff
+            else:
+                np.power(diff, p, out=power)
+            out += power
+    return distances
+
+
+def cosine_distances(X, Y):
+    """1 - cosine similarity; rows with zero norm have distance 1 to everything."""
+    X_norms = np.linalg.norm(X, axis=1)
+    Y_norms = np.linalg.norm(Y, axis=1)
+    X_norms[X_norms == 0] = np.inf
+    Y_norms[Y_norms == 0] = np.inf
+    similarity = X @ Y.T
+    similarity /= X_norms[:, None]
+    similarity /= Y_norms[None, :]
+    return np.subtract(1, similarity, out=similarity)
+
+
+class Metric:
+    """Entry of the metric registry.
+
+    Neighbours are searched on a cheaper `reduced` distance with the same
+    ordering (e.g. squared Euclidean); `finalize` turns the k selected reduced
+    distances into true distances. `prepare` computes per-train state once
+    (e.g. the squared norms of the training rows), which is passed to
+    `reduced` as keyword arguments on every call.
+
+    Args:
+    - name: Registry name.
+    - reduced: Function (X, Y) -> (n, m) reduced distances.
+    - finalize: Function applied to the selected reduced distances. Default is identity.
+    - tree_metric: Metric name for sklearn's KDTree/BallTree, or None if the metric does not
+      satisfy the triangle inequality.
+    - tree_kwargs: Extra arguments for the tree, e.g. {"p": 3}.
+    - prepare: Function Y -> dict of keyword arguments for reduced(X, Y, **state). Default is None.
+    """
+
+    def __init__(self, name, reduced, finalize=None, tree_metric=None, tree_kwargs=None, prepare=None):
+        self.name = name
+        self.reduced = reduced
+        self.finalize = finalize or (lambda distances: distances)
+        self.tree_metric = tree_metric
+        self.tree_kwargs = tree_kwargs or {}
+        self._prepare = prepare
+
+    def prepare(self, Y):
+        """State of Y that reduced can reuse across calls with the same Y."""
+        return self._prepare(Y) if self._prepare is not None else {}
+
+    def pairwise(self, X, Y):
+        return self.finalize(self.reduced(X, Y, **self.prepare(Y)))
+
+    def __repr__(self):
+        return f"Metric({self.name!r})"
+
+
+def minkowski(p):
+    """Registry entry of the Minkowski distance of order p (p >= 1)."""
+    if p == 1:
+        return Metric("manhattan", manhattan_distances, tree_metric="manhattan")
+    if p == 2:
+        return Metric("euclidean", lambda X, Y, Y_sq_norms=None: euclidean_distances(X, Y, Y_sq_norms, squared=True),
+                      np.sqrt, tree_metric="euclidean",
+                      prepare=lambda Y: {"Y_sq_norms": np.einsum("ij,ij->i", Y, Y)})
+    if p == np.inf:
+        return Metric("chebyshev", chebyshev_distances, tree_metric="chebyshev")
+    return Metric(f"minkowski_p{p}", lambda X, Y: minkowski_reduced(X, Y, p), lambda d: d ** (1 / p),
+                  tree_metric="minkowski", tree_kwargs={"p": p})
+
+
+METRICS = {
+    "manhattan": minkowski(1),
+    "euclidean": minkowski(2),
+    "minkowski_p3": minkowski(3),
+    "chebyshev": minkowski(np.inf),
+    "cosine": Metric("cosine", cosine_distances),
+}
+
+# Names of the Python metric functions of exercise_6_solution.ipynb
+ALIASES = {
+    "L1_norm": "manhattan",
+    "L2_norm": "euclidean",
+    "L3_norm": "minkowski_p3",
+    "cosine_similarity": "cosine",
+}
+
+# Python functions with these names are replaced by their vectorized kernel (the metric functions of the notebook)
+NOTEBOOK_FUNCTIONS = frozenset(ALIASES) | {"chebyshev"}
+
+
+def register_metric(metric, *aliases):
+    """Add a Metric to the registry under its name and optional aliases."""
+    METRICS[metric.name] = metric
+    for alias in aliases:
+        ALIASES[alias] = metric.name
+    return metric
+
+
+def get_metric(metric, p=None):
+    """Resolve a metric given as registry name, alias, Metric or Python function.
+
+    The L1_norm, L2_norm, L3_norm, chebyshev and cosine_similarity functions of the exercise
+    are recognized by their __name__ and map to vectorized kernels. Any other function is used
+    as given, with one Python call per pair.
+
+    Args:
+    - metric: str, Metric or callable (x1, x2) -> float.
+    - p: Order for metric="minkowski".
+
+    Returns:
+    - Metric
+    """
+    if isinstance(metric, Metric):
+        return metric
+    if metric == "minkowski":
+        return minkowski(2 if p is None else p)
+    if callable(metric):
+        name = getattr(metric, "__name__", None)
+        if name in NOTEBOOK_FUNCTIONS:
+            return get_metric(name)
+        return Metric(name or "callable", lambda X, Y: np.array([[metric(x, y) for y in Y] for x in X]))
+    name = ALIASES.get(metric, metric)
+    if name not in METRICS:
+        raise KeyError(f"Unknown metric '{metric}', choose one of {sorted(METRICS) + sorted(ALIASES)}")
+    return METRICS[name]
+
+
+def pairwise_distances(X, Y, metric="euclidean", p=None):
+    """Distance matrix between the rows of X and Y for any registered metric."""
+    X = np.asarray(X, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64)
+    return get_metric(metric, p).pairwise(X, Y)
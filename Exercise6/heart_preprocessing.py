@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+HEART_PATH = "Heart_disease_cleveland_new.csv"
+
+# Continuous columns that are standardized in exercise_6_solution.ipynb
+SCALE_COLUMNS = ["age", "trestbps", "chol", "thalach", "oldpeak"]
+
+# Rows per chunk when streaming a CSV
+CHUNK_SIZE = 100_000
+
+
+class RunningStats:
+    """Per-column count, mean and co-moment matrix, updated chunk by chunk.
+
+    Chunks are combined with the pairwise update of Chan et al. (Welford's
+    algorithm for whole blocks), which stays numerically stable without ever
+    holding more than one chunk. The co-moment matrix is n_columns x n_columns,
+    so memory does not depend on the number of rows.
+    """
+
+    def __init__(self, n_columns):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.comoment = np.zeros((n_columns, n_columns))
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return self
+        mean = X.mean(axis=0)
+        centered = X - mean
+        return self._combine(len(X), mean, centered.T @ centered)
+
+    def merge(self, other):
+        return self._combine(other.count, other.mean, other.comoment)
+
+    def _combine(self, count, mean, comoment):
+        total = self.count + count
+        if not total:
+            return self
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.count * count / total)
+        self.count = total
+        return self
+
+    @property
+    def var(self):
+        """Population variance (ddof=0), as used by StandardScaler."""
+        return np.diag(self.comoment) / max(self.count, 1)
+
+    @property
+    def cov(self):
+        """Population covariance matrix."""
+        return self.comoment / max(self.count, 1)
+
+
+def iter_frames(source, chunksize=CHUNK_SIZE, columns=None):
+    """Yield DataFrame chunks of a CSV path, a DataFrame or an iterable of DataFrames."""
+    if isinstance(source, pd.DataFrame):
+        yield source if columns is None else source[columns]
+    elif isinstance(source, str):
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=columns, encoding="utf-8-sig")
+    else:
+        for frame in source:
+            yield frame if columns is None else frame[columns]
+
+
+class HeartPreprocessor:
+    """Out-of-core StandardScaler + PCA for the heart disease table.
+
+    fit streams the data once and collects mean and covariance with
+    RunningStats. Scaler and PCA are both derived from these statistics: the
+    covariance of the standardized data is the raw covariance divided by the
+    outer product of the scales, and its eigenvectors are the principal
+    components. Only one chunk is in memory at a time and the result equals
+    StandardScaler + PCA on the full table. The fitted transform is a mean, a
+    scale and a projection matrix; it can be saved to an .npz file and applied
+    to new chunks without refitting.
+
+    Args:
+    - scale_columns: Columns to standardize, the other features are used as they are.
+      Default is SCALE_COLUMNS.
+    - target: Name of the label column, excluded from the features. Default is "target".
+    - n_components: Number of principal components. Default is 2.
+    - chunksize: Rows per chunk when reading a CSV. Default is 100000.
+    """
+
+    def __init__(self, scale_columns=SCALE_COLUMNS, target="target", n_components=2, chunksize=CHUNK_SIZE):
+        self.scale_columns = list(scale_columns)
+        self.target = target
+        self.n_components = n_components
+        self.chunksize = chunksize
+
+    def _features(self, frame):
+        return frame.drop(columns=[self.target], errors="ignore")
+
+    def fit(self, source):
+        """Fit the scaler and the PCA in one pass over a CSV path, a DataFrame or an iterable of DataFrames."""
+        stats = None
+        for frame in iter_frames(source, self.chunksize):
+            features = self._features(frame)
+            if stats is None:
+                self.columns_ = list(features.columns)
+                stats = RunningStats(len(self.columns_))
+            stats.update(features[self.columns_].to_numpy(dtype=np.float64))
+        if stats is None or stats.count < self.n_components:
+            raise ValueError(f"At least n_components={self.n_components} rows are needed to fit")
+
+        # Only the scale columns are standardized, as in the notebook
+        scaled = np.isin(self.columns_, self.scale_columns)
+        scale = np.sqrt(stats.var)
+        scale[scale == 0] = 1
+        self.mean_ = np.where(scaled, stats.mean, 0)
+        self.scale_ = np.where(scaled, scale, 1)
+        self.n_samples_ = stats.count
+
+        # Mean and covariance of the standardized data follow from the raw statistics,
+        # so the PCA is the exact eigendecomposition without a second pass
+        self.pca_mean_ = (stats.mean - self.mean_) / self.scale_
+        cov = stats.cov / np.outer(self.scale_, self.scale_)
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        order = np.argsort(eigenvalues)[::-1][:self.n_components]
+        components = eigenvectors[:, order].T
+        # Same sign convention as sklearn's PCA: largest absolute loading of each component is positive
+        signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+        self.components_ = components * signs[:, None]
+        self.explained_variance_ratio_ = np.clip(eigenvalues[order], 0, None) / max(np.trace(cov), np.finfo(float).tiny)
+        return self
+
+    def scale(self, frame):
+        """Standardized feature matrix of a DataFrame chunk."""
+        return (self._features(frame)[self.columns_].to_numpy(dtype=np.float64) - self.mean_) / self.scale_
+
+    def transform(self, frame):
+        """Principal components of a DataFrame chunk, shape (n, n_components)."""
+        return (self.scale(frame) - self.pca_mean_) @ self.components_.T
+
+    def iter_transform(self, source):
+        """Yield (components, target) per chunk; target is None if the column is missing."""
+        for frame in iter_frames(source, self.chunksize):
+            y = frame[self.target].to_numpy() if self.target in frame else None
+            yield self.transform(frame), y
+
+    def save(self, path):
+        np.savez(
+            path, columns=np.array(self.columns_), scale_columns=np.array(self.scale_columns),
+            target=self.target, mean=self.mean_, scale=self.scale_, components=self.components_,
+            pca_mean=self.pca_mean_, explained_variance_ratio=self.explained_variance_ratio_,
+            n_samples=self.n_samples_,
+        )
+
+    @classmethod
+    def load(cls, path, chunksize=CHUNK_SIZE):
+        with np.load(path) as data:
+            preprocessor = cls(data["scale_columns"].tolist(), str(data["target"]), len(data["components"]), chunksize)
+            preprocessor.columns_ = data["columns"].tolist()
+            preprocessor.mean_ = data["mean"]
+            preprocessor.scale_ = data["scale"]
+            preprocessor.components_ = data["components"]
+            preprocessor.pca_mean_ = data["pca_mean"]
+            preprocessor.explained_variance_ratio_ = data["explained_variance_ratio"]
+            preprocessor.n_samples_ = int(data["n_samples"])
+        return preprocessor
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    import psutil
+
+    # Blow the heart disease table up to a few million rows
+    heart = pd.read_csv(HEART_PATH, encoding="utf-8-sig")
+    rng = np.random.default_rng(0)
+    path = os.path.join(tempfile.mkdtemp(), "heart_large.csv")
+    for i in range(10):
+        noisy = heart.sample(300_000, replace=True, random_state=i)
+        noisy[SCALE_COLUMNS] = noisy[SCALE_COLUMNS] + rng.normal(size=(len(noisy), len(SCALE_COLUMNS)))
+        noisy.to_csv(path, mode="a", header=i == 0, index=False)
+
+    process = psutil.Process()
+    start = time.time()
+    preprocessor = HeartPreprocessor().fit(path)
+    end = time.time()
+    print(f"Fit on {preprocessor.n_samples_} rows in {end - start:.3f} seconds, "
+          f"RSS {process.memory_info().rss / 2 ** 20:.0f} MB")
+    print("Explained variance ratio:", preprocessor.explained_variance_ratio_)
+
+    preprocessor.save(path + ".npz")
+    loaded = HeartPreprocessor.load(path + ".npz")
+    n = sum(len(X) for X, _ in loaded.iter_transform(path))
+    print(f"Transformed {n} rows with the saved transform, RSS {process.memory_info().rss / 2 ** 20:.0f} MB")
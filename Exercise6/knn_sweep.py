@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from classification_metrics import MetricsAccumulator
+from knn import KNNClassifier
+
+
+def roc_auc(y_true, scores):
+    """Area under the ROC curve from the rank statistic (ties get average ranks).
+
+    Args:
+    - y_true: Boolean array, True for the positive class.
+    - scores: Score per sample, higher means more likely positive.
+
+    Returns:
+    - float: AUC, or nan if only one class is present.
+    """
+    y_true = np.asarray(y_true, dtype=bool)
+    n_pos = int(y_true.sum())
+    n_neg = len(y_true) - n_pos
+    if not n_pos or not n_neg:
+        return np.nan
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    # Average 1-based rank of every distinct score
+    average_ranks = np.cumsum(counts) - (counts - 1) / 2
+    rank_sum = average_ranks[inverse][y_true].sum()
+    return (rank_sum - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+
+def metric_name(metric):
+    return metric if isinstance(metric, str) else getattr(metric, "__name__", getattr(metric, "name", repr(metric)))
+
+
+def knn_sweep(X_train, y_train, X_test, y_test, metrics=("euclidean",), ks=(1, 3, 5, 7, 9), positive=1,
+              return_scores=False):
+    """Evaluate kNN for every (metric, k) with one neighbour search per metric.
+
+    For each metric the max(ks) nearest neighbours of all test samples are
+    found once. The votes of the first k neighbours are then read from a
+    cumulative count over that ranking, so every further k costs O(n) instead
+    of a new fit and neighbour search.
+
+    Args:
+    - X_train, y_train, X_test, y_test: Training and test data.
+    - metrics: Metrics accepted by KNNClassifier (names, aliases or the notebook's functions).
+    - ks: Numbers of neighbours to evaluate.
+    - positive: Label of the positive class for precision, recall, F1 and AUC. Default is 1.
+    - return_scores: Also return the positive vote fraction per (metric name, k).
+
+    Returns:
+    - pd.DataFrame: One row per (metric, k) with accuracy, precision, recall, f1 and auc.
+      AUC is computed from the fraction of neighbours voting for the positive class.
+    - dict: {(metric name, k): scores}, only if return_scores is True.
+    """
+    ks = sorted(set(ks))
+    y_true = np.asarray(y_test) == positive
+    rows = []
+    all_scores = {}
+    for metric in metrics:
+        model = KNNClassifier(max(ks), metric=metric).fit(X_train, y_train)
+        _, indices = model.kneighbors(X_test)
+        n_classes = len(model.classes_)
+        # votes[i, j, c]: number of the first j + 1 neighbours of sample i with class c
+        votes = np.zeros(indices.shape + (n_classes,), dtype=np.int32)
+        np.put_along_axis(votes, model.y_[indices][..., None], 1, axis=2)
+        np.cumsum(votes, axis=1, out=votes)
+        positive_index = np.searchsorted(model.classes_, positive)
+        has_positive = positive_index < n_classes and model.classes_[positive_index] == positive
+
+        for k in ks:
+            counts = votes[:, k - 1, :]
+            y_pred = model.classes_[counts.argmax(axis=1)] == positive
+            scores = counts[:, positive_index] / k if has_positive else np.zeros(len(y_true))
+            row = {"metric": metric_name(metric), "k": k}
+            row.update(MetricsAccumulator(labels=[False, True]).update(y_true, y_pred).report(pos_label=True))
+            row["auc"] = roc_auc(y_true, scores)
+            rows.append(row)
+            all_scores[(metric_name(metric), k)] = scores
+
+    results = pd.DataFrame(rows)
+    return (results, all_scores) if return_scores else results
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60_000, 2))
+    y = (X[:, 0] * X[:, 1] + rng.normal(scale=0.3, size=len(X)) > 0).astype(int)
+    X_train, y_train, X_test, y_test = X[:50_000], y[:50_000], X[50_000:], y[50_000:]
+    metrics = ("manhattan", "euclidean", "minkowski_p3", "chebyshev", "cosine")
+    ks = range(1, 30, 2)
+
+    start = time.time()
+    results = knn_sweep(X_train, y_train, X_test, y_test, metrics, ks)
+    end = time.time()
+    print(f"{len(results)} (metric, k) cells in {end - start:.3f} seconds")
+    print(results.sort_values("f1", ascending=False).head())
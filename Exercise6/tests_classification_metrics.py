@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+from sklearn import metrics
+
+from classification_metrics import MetricsAccumulator
+
+
+class TestMetricsAccumulator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.y_true = rng.integers(0, 4, size=1000)
+        self.y_pred = np.where(rng.random(1000) < 0.6, self.y_true, rng.integers(0, 4, size=1000))
+
+    def test_matches_sklearn(self):
+        accumulator = MetricsAccumulator().update(self.y_true, self.y_pred)
+        np.testing.assert_array_equal(accumulator.confusion_matrix, metrics.confusion_matrix(self.y_true, self.y_pred))
+        self.assertAlmostEqual(accumulator.accuracy(), metrics.accuracy_score(self.y_true, self.y_pred))
+        for average in (None, "micro", "macro", "weighted"):
+            np.testing.assert_allclose(accumulator.precision(average),
+                                       metrics.precision_score(self.y_true, self.y_pred, average=average))
+            np.testing.assert_allclose(accumulator.recall(average),
+                                       metrics.recall_score(self.y_true, self.y_pred, average=average))
+            np.testing.assert_allclose(accumulator.f1(average),
+                                       metrics.f1_score(self.y_true, self.y_pred, average=average))
+        binary = MetricsAccumulator().update(self.y_true % 2, self.y_pred % 2)
+        self.assertAlmostEqual(binary.f1(), metrics.f1_score(self.y_true % 2, self.y_pred % 2))
+
+    def test_merge_of_batches(self):
+        total = MetricsAccumulator().update(self.y_true, self.y_pred)
+        # Workers see different subsets of the labels, the merge has to align them
+        low, high = self.y_true < 2, self.y_true >= 2
+        merged = MetricsAccumulator().update(self.y_true[low & (self.y_pred < 2)], self.y_pred[low & (self.y_pred < 2)])
+        rest = MetricsAccumulator().update(self.y_true[high], self.y_pred[high])
+        other = MetricsAccumulator()
+        for start in range(0, len(self.y_true), 64):
+            mask = (low & (self.y_pred >= 2))[start:start + 64]
+            other.update(self.y_true[start:start + 64][mask], self.y_pred[start:start + 64][mask])
+        merged.merge(rest, other)
+        np.testing.assert_array_equal(merged.confusion_matrix, total.confusion_matrix)
+
+    def test_fixed_labels(self):
+        accumulator = MetricsAccumulator(labels=[0, 1])
+        with self.assertRaises(ValueError):
+            accumulator.update([0, 2], [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
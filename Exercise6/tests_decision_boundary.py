@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from decision_boundary import decision_grid, decision_grids, grid_range
+from knn import KNNClassifier
+
+
+class TestDecisionBoundary(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X_train = rng.normal(size=(200, 2)) * 2
+        self.y_train = (self.X_train[:, 0] * self.X_train[:, 1] + rng.normal(size=200) > 0).astype(int)
+        self.options = {"coarse": 8, "levels": 3}
+
+    def expected(self, metric):
+        model = KNNClassifier(5, metric=metric).fit(self.X_train, self.y_train)
+        return decision_grid(model, *grid_range(self.X_train), **self.options)[2]
+
+    def test_matches_dense_grid(self):
+        model = KNNClassifier(5).fit(self.X_train, self.y_train)
+        xs, ys, Z, n_predicted = decision_grid(model, *grid_range(self.X_train), **self.options)
+        xx, yy = np.meshgrid(xs, ys)
+        dense = model.predict(np.c_[xx.ravel(), yy.ravel()]).reshape(xx.shape)
+        self.assertLess(n_predicted, Z.size)
+        self.assertLessEqual(np.count_nonzero(dense != Z), Z.size // 100)
+
+    def test_user_function_with_registry_name(self):
+        # Shares its name with the registered Euclidean metric, but computes the L1 distance
+        def euclidean(x1, x2):
+            return np.sum(np.abs(x1 - x2))
+
+        grids = decision_grids(self.X_train, self.y_train, 5, {"user": euclidean, "registry": "euclidean"},
+                               workers=2, **self.options)
+        np.testing.assert_array_equal(grids["user"][2], self.expected(euclidean))
+        np.testing.assert_array_equal(grids["registry"][2], self.expected("euclidean"))
+        self.assertFalse(np.array_equal(grids["user"][2], grids["registry"][2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
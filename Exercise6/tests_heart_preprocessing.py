@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from heart_preprocessing import HEART_PATH, SCALE_COLUMNS, HeartPreprocessor, RunningStats
+
+
+class TestHeartPreprocessing(unittest.TestCase):
+
+    def setUp(self):
+        self.heart = pd.read_csv(HEART_PATH, encoding="utf-8-sig")
+
+    def test_matches_standard_scaler_and_pca(self):
+        # The preprocessing of exercise_6_solution.ipynb on the full table
+        features = self.heart.drop(columns=["target"])
+        features[SCALE_COLUMNS] = StandardScaler().fit_transform(features[SCALE_COLUMNS])
+        pca = PCA(n_components=2)
+        expected = pca.fit_transform(features)
+
+        preprocessor = HeartPreprocessor().fit(self.heart)
+        np.testing.assert_allclose(preprocessor.scale(self.heart), features.to_numpy(), atol=1e-12)
+        np.testing.assert_allclose(preprocessor.transform(self.heart), expected, atol=1e-12)
+        np.testing.assert_allclose(preprocessor.explained_variance_ratio_, pca.explained_variance_ratio_, atol=1e-12)
+
+    def test_chunked_fit_matches_single_shot(self):
+        single = HeartPreprocessor().fit(self.heart)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "heart.csv")
+        self.heart.to_csv(path, index=False)
+        for chunksize in (1, 7, 100):
+            chunked = HeartPreprocessor(chunksize=chunksize).fit(path)
+            self.assertEqual(chunked.n_samples_, len(self.heart))
+            np.testing.assert_allclose(chunked.mean_, single.mean_, rtol=1e-12)
+            np.testing.assert_allclose(chunked.scale_, single.scale_, rtol=1e-12)
+            np.testing.assert_allclose(chunked.components_, single.components_, atol=1e-12)
+            transformed = np.concatenate([X for X, _ in chunked.iter_transform(path)])
+            np.testing.assert_allclose(transformed, single.transform(self.heart), atol=1e-12)
+
+        chunked.save(path + ".npz")
+        loaded = HeartPreprocessor.load(path + ".npz")
+        np.testing.assert_array_equal(loaded.transform(self.heart), chunked.transform(self.heart))
+
+    def test_running_stats_merge(self):
+        X = np.random.default_rng(0).normal(loc=1e6, size=(500, 3))
+        left, right = RunningStats(3).update(X[:123]), RunningStats(3).update(X[123:])
+        merged = left.merge(right)
+        np.testing.assert_allclose(merged.mean, X.mean(axis=0), rtol=1e-14)
+        np.testing.assert_allclose(merged.cov, np.cov(X.T, ddof=0), atol=1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
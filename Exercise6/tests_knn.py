@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+
+import distance_metrics
+from distance_metrics import get_metric, pairwise_distances
+from knn import KNNClassifier, knn_predict
+
+
+def knn_func(X_train, y_train, X_test, k):
+    # Reference implementation from exercise_6_solution.ipynb
+    y_pred = []
+    for i in range(len(X_test)):
+        distances = []
+        for j in range(len(X_train)):
+            distance = np.sqrt(np.sum(np.square(X_test[i] - X_train[j])))
+            distances.append([distance, j])
+        distances.sort()
+        targets = []
+        for j in range(k):
+            index = distances[j][1]
+            targets.append(y_train[index])
+        y_pred.append(max(set(targets), key=targets.count))
+    return y_pred
+
+
+class TestKNN(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.X_train = rng.normal(size=(120, 4))
+        self.y_train = list((self.X_train[:, 0] + self.X_train[:, 1] > 0).astype(int))
+        self.X_test = rng.normal(size=(40, 4))
+
+    def test_matches_reference(self):
+        for k in (1, 3, 5):
+            expected = knn_func(self.X_train, self.y_train, self.X_test, k)
+            np.testing.assert_array_equal(knn_predict(self.X_train, self.y_train, self.X_test, k), expected)
+
+    def test_small_memory_budget(self):
+        model = KNNClassifier(k=5).fit(self.X_train, self.y_train)
+        # A budget of one row forces one block per test sample
+        blocked = KNNClassifier(k=5, algorithm="brute", memory_budget=1).fit(self.X_train, self.y_train)
+        np.testing.assert_array_equal(blocked.predict(self.X_test), model.predict(self.X_test))
+        distances, indices = model.kneighbors(self.X_test)
+        full = np.linalg.norm(self.X_test[:, None] - self.X_train[None], axis=2)
+        np.testing.assert_allclose(distances, np.sort(full, axis=1)[:, :5])
+
+    def test_metrics_match_python_functions(self):
+        python_metrics = {
+            "L1_norm": lambda x1, x2: np.sum(np.abs(x1 - x2)),
+            "L2_norm": lambda x1, x2: np.sqrt(np.sum(np.square(x1 - x2))),
+            "L3_norm": lambda x1, x2: np.power(np.sum(np.power(np.abs(x1 - x2), 3)), 1 / 3),
+            "chebyshev": lambda x1, x2: np.max(np.abs(x1 - x2)),
+            "cosine_similarity": lambda x1, x2: 1 - np.dot(x1, x2) / (np.linalg.norm(x1) * np.linalg.norm(x2)),
+        }
+        for name, func in python_metrics.items():
+            expected = np.array([[func(x, y) for y in self.X_train] for x in self.X_test])
+            np.testing.assert_allclose(pairwise_distances(self.X_test, self.X_train, name), expected, atol=1e-9)
+            brute = KNNClassifier(k=5, metric=name, algorithm="brute").fit(self.X_train, self.y_train)
+            auto = KNNClassifier(k=5, metric=name).fit(self.X_train, self.y_train)
+            np.testing.assert_allclose(brute.kneighbors(self.X_test)[0], np.sort(expected, axis=1)[:, :5], atol=1e-9)
+            np.testing.assert_allclose(auto.kneighbors(self.X_test)[0], np.sort(expected, axis=1)[:, :5], atol=1e-9)
+
+    def test_train_norms_computed_once(self):
+        calls = []
+        original = distance_metrics.euclidean_distances
+
+        def euclidean_distances(X, Y, Y_sq_norms=None, squared=False):
+            calls.append(Y_sq_norms is not None)
+            return original(X, Y, Y_sq_norms, squared)
+
+        distance_metrics.euclidean_distances = euclidean_distances
+        try:
+            model = KNNClassifier(k=5, algorithm="brute", memory_budget=8 * 120 * 10).fit(self.X_train, self.y_train)
+            model.predict(self.X_test)
+        finally:
+            distance_metrics.euclidean_distances = original
+        self.assertEqual(calls, [True] * 4)
+
+    def test_callables_matched_by_notebook_name_only(self):
+        def L2_norm(x1, x2):
+            return np.sqrt(np.sum(np.square(x1 - x2)))
+
+        def euclidean(x1, x2):
+            return np.sum(np.abs(x1 - x2))
+
+        def chebyshev(x1, x2):
+            return np.max(np.abs(x1 - x2))
+
+        self.assertIs(get_metric(L2_norm), get_metric("euclidean"))
+        self.assertIs(get_metric(chebyshev), get_metric("chebyshev"))
+        self.assertEqual(get_metric(chebyshev).tree_metric, "chebyshev")
+        expected = np.array([[euclidean(x, y) for y in self.X_train[:5]] for x in self.X_test[:3]])
+        np.testing.assert_allclose(pairwise_distances(self.X_test[:3], self.X_train[:5], euclidean), expected)
+
+    def test_string_labels(self):
+        labels = np.where(np.asarray(self.y_train) == 1, "disease", "healthy")
+        y_pred = KNNClassifier(k=3).fit(self.X_train, labels).predict(self.X_test)
+        self.assertTrue(set(y_pred) <= {"disease", "healthy"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+from knn import KNNClassifier
+from knn_sweep import knn_sweep, roc_auc
+
+
+class TestKNNSweep(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.X_train = rng.normal(size=(300, 3))
+        self.y_train = (self.X_train[:, 0] * self.X_train[:, 1] + rng.normal(scale=0.3, size=300) > 0).astype(int)
+        self.X_test = rng.normal(size=(80, 3))
+        self.y_test = (self.X_test[:, 0] * self.X_test[:, 1] > 0).astype(int)
+
+    def test_matches_separate_classifiers(self):
+        ks = (1, 2, 3, 4, 7, 10)
+        metrics = ("euclidean", "manhattan", "cosine")
+        results, scores = knn_sweep(self.X_train, self.y_train, self.X_test, self.y_test, metrics, ks,
+                                    return_scores=True)
+        self.assertEqual(len(results), len(metrics) * len(ks))
+        for metric in metrics:
+            for k in ks:
+                model = KNNClassifier(k, metric=metric).fit(self.X_train, self.y_train)
+                y_pred = model.predict(self.X_test)
+                proba = model.predict_proba(self.X_test)[:, 1]
+                row = results[(results["metric"] == metric) & (results["k"] == k)].iloc[0]
+                self.assertAlmostEqual(row["accuracy"], accuracy_score(self.y_test, y_pred))
+                self.assertAlmostEqual(row["precision"], precision_score(self.y_test, y_pred, zero_division=0))
+                self.assertAlmostEqual(row["recall"], recall_score(self.y_test, y_pred))
+                self.assertAlmostEqual(row["f1"], f1_score(self.y_test, y_pred))
+                np.testing.assert_allclose(scores[(metric, k)], proba)
+                self.assertAlmostEqual(row["auc"], roc_auc_score(self.y_test, proba))
+
+    def test_roc_auc_matches_sklearn(self):
+        rng = np.random.default_rng(6)
+        y_true = rng.random(500) > 0.4
+        for scores in (rng.normal(size=500), rng.integers(0, 5, 500) / 4, np.full(500, 0.5)):
+            self.assertAlmostEqual(roc_auc(y_true, scores), roc_auc_score(y_true, scores))
+        self.assertTrue(np.isnan(roc_auc(np.ones(10, dtype=bool), np.arange(10))))
+
+
+if __name__ == "__main__":
+    unittest.main()